@@ -8,13 +8,16 @@ __email__ = "info@pagepalapp.com"
 
 from .cfi_parser import CFIParser
 from .cfi_processor import CFIProcessor
+from .cfi_validator import CFIValidator
 from .epub_parser import EPUBParser
-from .exceptions import CFIError, EPUBError
+from .exceptions import CFIError, CFIErrorCode, EPUBError
 
 __all__ = [
     "CFIProcessor",
     "CFIParser",
+    "CFIValidator",
     "EPUBParser",
     "CFIError",
+    "CFIErrorCode",
     "EPUBError",
 ]
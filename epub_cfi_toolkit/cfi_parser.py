@@ -3,21 +3,58 @@ CFI parsing functionality for EPUB Canonical Fragment Identifiers.
 """
 
 import re
-from dataclasses import dataclass
-from typing import List, Optional
+import sys
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import List, Optional, Tuple
 
 from .exceptions import CFIError
 
+# Match CFI step components: /step[assertion]
+# Retained as a reference for the hand-rolled scan in _parse_steps.
+_STEP_PATTERN = re.compile(r"/(\d+)(?:\[([^\]]+)\])?")
 
-@dataclass
+# Circumflex (^) escaping per CFI spec; only [ ] ^ , ( ) ; may be
+# escaped, so an invalid sequence like ^x is left untouched.
+_UNESCAPE_PATTERN = re.compile(r"\^([\[\]\^,();])")
+_ESCAPE_PATTERN = re.compile(r"([\[\]\^,();])")
+
+
+@dataclass(frozen=True, slots=True)
 class CFIStep:
     """Represents a single step in a CFI path."""
 
     index: int
     assertion: Optional[str] = None
+    # Derived once at construction (and steps are interned, so once per
+    # distinct step): odd indices address text nodes, and child_index is
+    # the 0-based child position an element step resolves to.
+    is_text: bool = field(init=False)
+    child_index: int = field(init=False)
+
+    def __post_init__(self) -> None:
+        # Frozen dataclass: derived fields must bypass __setattr__
+        object.__setattr__(self, "is_text", bool(self.index & 1))
+        object.__setattr__(
+            self,
+            "child_index",
+            self.index >> 1 if self.index & 1 else (self.index >> 1) - 1,
+        )
+
+
+@lru_cache(maxsize=4096)
+def _intern_step(index: int, assertion: Optional[str]) -> CFIStep:
+    """
+    Return a shared CFIStep for (index, assertion).
 
+    CFI paths share long prefixes (all bookmarks in a chapter repeat the
+    same spine and leading content steps), so interning equal steps saves
+    memory and lets comparisons short-circuit on identity.
+    """
+    return CFIStep(index=index, assertion=assertion)
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class CFILocation:
     """Represents a location within a text node."""
 
@@ -25,12 +62,14 @@ class CFILocation:
     length: Optional[int] = None  # For ranges
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ParsedCFI:
     """Represents a fully parsed CFI."""
 
-    spine_steps: List[CFIStep]
-    content_steps: List[CFIStep]
+    # Step sequences are tuples so a ParsedCFI is fully immutable and
+    # hashable (usable directly as a cache key).
+    spine_steps: Tuple[CFIStep, ...]
+    content_steps: Tuple[CFIStep, ...]
     location: Optional[CFILocation] = None
 
     @property
@@ -55,13 +94,9 @@ class CFIParser:
 
     def __init__(self) -> None:
         """Initialize the CFI parser."""
-        # Match CFI components: /step[assertion] or /step:offset or
-        # /step:offset~length
-        self._step_pattern = re.compile(r"/(\d+)(?:\[([^\]]+)\])?")
-        self._location_pattern = re.compile(r":(\d+)(?:~(\d+))?$")
-
-        # Characters that need to be escaped with circumflex (^) per CFI spec
-        self._escape_chars = {"[", "]", "^", ",", "(", ")", ";"}
+        # Parsing is deterministic and callers (e.g. readers re-resolving
+        # bookmarks) tend to repeat the same CFI strings, so memoize.
+        self._parse_cached = lru_cache(maxsize=1024)(self._parse_impl)
 
     def parse(self, cfi: str) -> ParsedCFI:
         """
@@ -80,6 +115,106 @@ class CFIParser:
         if not cfi:
             raise CFIError("CFI cannot be empty")
 
+        return self._parse_cached(cfi)
+
+    def parse_many(self, cfis: List[str]) -> List[ParsedCFI]:
+        """
+        Parse a batch of CFI strings.
+
+        Convenience for callers loading many CFIs at once (e.g. a user's
+        annotation set); avoids per-call method dispatch in the caller's
+        loop and shares the parse cache across the batch.
+
+        Args:
+            cfis: CFI strings to parse
+
+        Returns:
+            List of ParsedCFI objects in input order
+
+        Raises:
+            CFIError: If any CFI cannot be parsed
+        """
+        parse = self.parse
+        return [parse(cfi) for cfi in cfis]
+
+    def parse_range(
+        self, start_cfi: str, end_cfi: str
+    ) -> Tuple[ParsedCFI, ParsedCFI]:
+        """
+        Parse the two endpoints of a CFI range.
+
+        Range endpoints almost always share a long prefix (same spine
+        item, same leading content steps). That common work is not
+        redone here: the parse cache returns a prior result for repeated
+        strings, and _intern_step makes the shared prefix steps the
+        same objects in both results, so no duplicate step parsing or
+        allocation survives either way.
+
+        Args:
+            start_cfi: The CFI string marking the start of the range
+            end_cfi: The CFI string marking the end of the range
+
+        Returns:
+            Tuple of (parsed start, parsed end)
+
+        Raises:
+            CFIError: If either CFI cannot be parsed
+        """
+        if start_cfi == end_cfi:
+            parsed = self.parse(start_cfi)
+            return parsed, parsed
+        return self.parse(start_cfi), self.parse(end_cfi)
+
+    def parse_and_validate(self, cfi: str) -> ParsedCFI:
+        """
+        Parse a CFI string, validating its syntax during the same scan.
+
+        Unlike parse(), which skips over malformed fragments the way the
+        original regex scan did, this raises on any text that is not part
+        of a well-formed CFI. Validation happens inline during parsing,
+        so syntactically checking and using a CFI costs a single pass.
+
+        Args:
+            cfi: The CFI string to parse and validate
+
+        Returns:
+            ParsedCFI object with parsed components
+
+        Raises:
+            CFIError: If the CFI is empty, malformed, or contains
+                content that is not valid CFI syntax
+        """
+        if not cfi:
+            raise CFIError("CFI cannot be empty")
+
+        if self._is_range_cfi(cfi):
+            return self._parse_range_cfi(cfi, strict=True)
+        return self._parse_simple_cfi(cfi, strict=True)
+
+    def try_parse(
+        self, cfi: str
+    ) -> "Tuple[Optional[ParsedCFI], Optional[str]]":
+        """
+        Parse and validate a CFI without raising on failure.
+
+        Callers that treat bad CFIs as a normal outcome (validators,
+        batch imports) would otherwise pay for raising and catching
+        CFIError on every rejected string; here a rejection is just a
+        returned tuple.
+
+        Args:
+            cfi: The CFI string to parse and validate
+
+        Returns:
+            (parsed, None) on success, (None, error message) on failure
+        """
+        try:
+            return self.parse_and_validate(cfi), None
+        except CFIError as e:
+            return None, str(e)
+
+    def _parse_impl(self, cfi: str) -> ParsedCFI:
+        """Parse a CFI string (uncached implementation behind parse)."""
         # Check if this is a range CFI with comma syntax
         if self._is_range_cfi(cfi):
             return self._parse_range_cfi(cfi)
@@ -87,39 +222,56 @@ class CFIParser:
         # Parse as simple CFI
         return self._parse_simple_cfi(cfi)
 
+    @staticmethod
+    def _split_top_level(inner: str) -> List[str]:
+        """
+        Split a CFI body on separator commas.
+
+        A comma only separates range parts when it is neither escaped
+        (^,) nor inside a [...] assertion, so a single scan tracking
+        bracket depth finds the real separators.
+        """
+        parts = []
+        depth = 0
+        start = 0
+        i = 0
+        n = len(inner)
+        while i < n:
+            c = inner[i]
+            if c == "^":
+                # Escaped character: whatever follows is literal
+                i += 2
+                continue
+            if c == "[":
+                depth += 1
+            elif c == "]" and depth:
+                depth -= 1
+            elif c == "," and depth == 0:
+                parts.append(inner[start:i])
+                start = i + 1
+            i += 1
+        parts.append(inner[start:])
+        return parts
+
     def _is_range_cfi(self, cfi: str) -> bool:
         """Check if CFI uses range syntax with commas."""
         # Range CFI has format: epubcfi(parent, start, end)
         cleaned = cfi.strip()
+        if "," not in cleaned:
+            # C-level scan rejects the common simple-CFI case cheaply
+            return False
         if cleaned.startswith("epubcfi(") and cleaned.endswith(")"):
-            inner = cleaned[8:-1]
-            # Count non-escaped commas
-            comma_count = 0
-            i = 0
-            while i < len(inner):
-                if inner[i] == "," and (i == 0 or inner[i - 1] != "^"):
-                    comma_count += 1
-                i += 1
-            return comma_count == 2
+            return len(self._split_top_level(cleaned[8:-1])) == 3
         return False
 
-    def _parse_range_cfi(self, cfi: str) -> ParsedCFI:
+    def _parse_range_cfi(self, cfi: str, strict: bool = False) -> ParsedCFI:
         """Parse a range CFI with comma syntax: epubcfi(parent, start, end)."""
         # Extract inner content
         inner = cfi.strip()[8:-1]  # Remove epubcfi( and )
 
-        # Split by non-escaped commas
-        parts = []
-        current_part: List[str] = []
-        i = 0
-        while i < len(inner):
-            if inner[i] == "," and (i == 0 or inner[i - 1] != "^"):
-                parts.append("".join(current_part).strip())
-                current_part = []
-            else:
-                current_part.append(inner[i])
-            i += 1
-        parts.append("".join(current_part).strip())
+        # Same separator scan as _is_range_cfi, so detection and the
+        # actual split can never disagree on what counts as a comma.
+        parts = [part.strip() for part in self._split_top_level(inner)]
 
         if len(parts) != 3:
             raise CFIError(
@@ -131,9 +283,16 @@ class CFIParser:
         # A full implementation would need to handle the range semantics
         # properly
         full_start_cfi = parent_path + start_subpath
-        return self._parse_simple_cfi(full_start_cfi)
 
-    def _parse_simple_cfi(self, cfi: str) -> ParsedCFI:
+        # Only the start endpoint is returned, but strict mode promises
+        # to reject any malformed text, so the end subpath must be
+        # validated too (the parse result is discarded).
+        if strict:
+            self._parse_simple_cfi(parent_path + end_subpath, strict=True)
+
+        return self._parse_simple_cfi(full_start_cfi, strict=strict)
+
+    def _parse_simple_cfi(self, cfi: str, strict: bool = False) -> ParsedCFI:
         """Parse a simple (non-range) CFI."""
         # Remove epubcfi() wrapper if present
         cleaned_cfi = self._clean_cfi(cfi)
@@ -146,26 +305,39 @@ class CFIParser:
             content_part = ""
 
         # Parse spine steps
-        spine_steps = self._parse_steps(spine_part)
+        spine_steps = self._parse_steps(spine_part, strict=strict)
 
         # Parse content steps and location
-        content_steps = []
+        content_steps: Tuple[CFIStep, ...] = ()
         location = None
 
         if content_part:
-            # Check for location offset at the end
-            location_match = self._location_pattern.search(content_part)
-            if location_match:
-                offset = int(location_match.group(1))
-                length = (
-                    int(location_match.group(2)
-                        ) if location_match.group(2) else None
+            # Check for a trailing :offset or :offset~length location.
+            # The grammar is trivial, so rfind + digit checks beat a regex.
+            colon = content_part.rfind(":")
+            if colon != -1:
+                offset_part, tilde, length_part = (
+                    content_part[colon + 1:].partition("~")
                 )
-                location = CFILocation(offset=offset, length=length)
-                # Remove location part for step parsing
-                content_part = content_part[: location_match.start()]
-
-            content_steps = self._parse_steps(content_part)
+                if offset_part.isdecimal() and (
+                    not tilde or length_part.isdecimal()
+                ):
+                    location = CFILocation(
+                        offset=int(offset_part),
+                        length=int(length_part) if tilde else None,
+                    )
+                    # Remove location part for step parsing
+                    content_part = content_part[:colon]
+                elif strict and "]" not in offset_part and "/" not in offset_part:
+                    # The colon trails the final step (it is not part of
+                    # an assertion or an earlier step), so it must be a
+                    # well-formed location
+                    raise CFIError(
+                        f"Invalid location offset in CFI: "
+                        f"{content_part[colon:]}"
+                    )
+
+            content_steps = self._parse_steps(content_part, strict=strict)
 
         return ParsedCFI(
             spine_steps=spine_steps, content_steps=content_steps, location=location
@@ -188,18 +360,85 @@ class CFIParser:
 
         return cfi
 
-    def _parse_steps(self, path_part: str) -> List[CFIStep]:
-        """Parse a path part into CFI steps."""
+    def _parse_steps(
+        self, path_part: str, strict: bool = False
+    ) -> Tuple[CFIStep, ...]:
+        """
+        Parse a path part into CFI steps.
+
+        In strict mode, any text that is not part of a well-formed step
+        raises CFIError instead of being skipped.
+        """
         if not path_part:
-            return []
+            return ()
 
+        # Hand-rolled scan instead of regex matching: CFI paths are short
+        # strings where regex setup and match-object allocation dominate.
+        # Semantics mirror _step_pattern, which is kept as a reference.
         steps = []
-        for match in self._step_pattern.finditer(path_part):
-            index = int(match.group(1))
-            assertion = match.group(2)
-            steps.append(CFIStep(index=index, assertion=assertion))
+        s = path_part
+        n = len(s)
+        i = s.find("/")
+        if strict and i != 0:
+            raise CFIError(f"CFI path must start with '/': {path_part}")
+        while i != -1:
+            i += 1
+            # Slice the digit run with C-level find instead of walking
+            # characters: it extends to the next structural character
+            # ('/' or '[') or the end of the input.
+            end = s.find("/", i)
+            bracket = s.find("[", i)
+            if end == -1 or (bracket != -1 and bracket < end):
+                end = bracket
+            if end == -1:
+                end = n
+            digit_run = s[i:end]
+            if not (digit_run.isascii() and digit_run.isdecimal()):
+                # Junk after the step number (or no number at all): trim
+                # to the leading ASCII-digit prefix, character by
+                # character — rare, so the slow path does not matter
+                k = 0
+                while k < len(digit_run) and "0" <= digit_run[k] <= "9":
+                    k += 1
+                digit_run = digit_run[:k]
+                end = i + k
+            if not digit_run:
+                if strict:
+                    raise CFIError(
+                        f"Expected step number at position {i} in: "
+                        f"{path_part}"
+                    )
+                # No step number after '/': skip ahead like finditer would
+                i = s.find("/", i)
+                continue
+            index = int(digit_run)
+            i = end
+
+            assertion = None
+            if i < n and s[i] == "[":
+                end = s.find("]", i + 1)
+                if end > i + 1:
+                    # Non-empty assertion, matching the [^\]]+ semantics.
+                    # Interned: the same ids recur across every CFI into
+                    # a chapter, and interning makes the _intern_step
+                    # cache probe and later equality checks pointer-fast.
+                    assertion = sys.intern(s[i + 1:end])
+                    i = end + 1
+                elif strict:
+                    raise CFIError(
+                        f"Malformed assertion at position {i} in: "
+                        f"{path_part}"
+                    )
+
+            steps.append(_intern_step(index, assertion))
+            if strict and i < n and s[i] != "/":
+                raise CFIError(
+                    f"Unexpected character {s[i]!r} at position {i} in: "
+                    f"{path_part}"
+                )
+            i = s.find("/", i)
 
-        return steps
+        return tuple(steps)
 
     def _unescape_cfi(self, cfi: str) -> str:
         """
@@ -207,26 +446,7 @@ class CFIParser:
 
         Per CFI spec, these characters must be escaped: [ ] ^ , ( ) ;
         """
-        result = []
-        i = 0
-        while i < len(cfi):
-            char = cfi[i]
-            if char == "^" and i + 1 < len(cfi):
-                # Found escape sequence
-                next_char = cfi[i + 1]
-                if next_char in self._escape_chars:
-                    # Valid escape sequence
-                    result.append(next_char)
-                    i += 2  # Skip both ^ and the escaped character
-                else:
-                    # Invalid escape sequence - treat ^ as literal
-                    result.append(char)
-                    i += 1
-            else:
-                result.append(char)
-                i += 1
-
-        return "".join(result)
+        return _UNESCAPE_PATTERN.sub(r"\1", cfi)
 
     def _escape_cfi(self, cfi: str) -> str:
         """
@@ -234,13 +454,7 @@ class CFIParser:
 
         This is used when generating CFI strings.
         """
-        result = []
-        for char in cfi:
-            if char in self._escape_chars:
-                result.append("^" + char)
-            else:
-                result.append(char)
-        return "".join(result)
+        return _ESCAPE_PATTERN.sub(r"^\1", cfi)
 
     def compare_cfis(self, cfi1: ParsedCFI, cfi2: ParsedCFI) -> int:
         """
@@ -259,38 +473,45 @@ class CFIParser:
             raise CFIError(
                 "CFI must contain both spine and itemref references")
 
-        if cfi1.spine_steps[1].index != cfi2.spine_steps[1].index:
-            if cfi1.spine_steps[1].index < cfi2.spine_steps[1].index:
-                return -1
-            else:
-                return 1
+        # Three-way comparisons use (a > b) - (a < b), which avoids the
+        # branchy if/elif ladders on every step when sorting CFI lists.
+        result = ((cfi1.spine_steps[1].index > cfi2.spine_steps[1].index)
+                  - (cfi1.spine_steps[1].index < cfi2.spine_steps[1].index))
+        if result:
+            return result
 
         # Compare content steps
-        min_steps = min(len(cfi1.content_steps), len(cfi2.content_steps))
-
-        for i in range(min_steps):
-            if cfi1.content_steps[i].index < cfi2.content_steps[i].index:
-                return -1
-            elif cfi1.content_steps[i].index > cfi2.content_steps[i].index:
-                return 1
+        steps1 = cfi1.content_steps
+        steps2 = cfi2.content_steps
+        for s1, s2 in zip(steps1, steps2):
+            if s1 is s2:
+                # Interned steps: identical objects compare equal
+                continue
+            result = (s1.index > s2.index) - (s1.index < s2.index)
+            if result:
+                return result
 
         # If all compared steps are equal, compare by number of steps
-        if len(cfi1.content_steps) < len(cfi2.content_steps):
-            return -1
-        elif len(cfi1.content_steps) > len(cfi2.content_steps):
-            return 1
-
-        # Same path, compare locations
-        if cfi1.location and cfi2.location:
-            if cfi1.location.offset < cfi2.location.offset:
-                return -1
-            elif cfi1.location.offset > cfi2.location.offset:
-                return 1
-            else:
-                return 0
-        elif cfi1.location is None and cfi2.location is None:
-            return 0
-        elif cfi1.location is None:
-            return -1
-        else:
-            return 1
+        result = (len(steps1) > len(steps2)) - (len(steps1) < len(steps2))
+        if result:
+            return result
+
+        # Same path, compare locations (a missing location sorts first)
+        offset1 = cfi1.location.offset if cfi1.location else -1
+        offset2 = cfi2.location.offset if cfi2.location else -1
+        return (offset1 > offset2) - (offset1 < offset2)
+
+
+# Shared parser behind the module-level convenience functions, so callers
+# that don't hold a CFIParser still benefit from one warm parse cache.
+_default_parser = CFIParser()
+
+
+def parse(cfi: str) -> ParsedCFI:
+    """Parse a CFI string using the shared module-level parser."""
+    return _default_parser.parse(cfi)
+
+
+def compare_cfis(cfi1: ParsedCFI, cfi2: ParsedCFI) -> int:
+    """Compare two parsed CFIs using the shared module-level parser."""
+    return _default_parser.compare_cfis(cfi1, cfi2)
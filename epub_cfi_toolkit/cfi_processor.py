@@ -2,14 +2,60 @@
 CFI processing functionality for EPUB files.
 """
 
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from lxml import etree
 
-from .cfi_parser import CFIParser, ParsedCFI
+from .cfi_parser import CFIParser, CFIStep, ParsedCFI
+from .cfi_validator import CFIValidator
 from .epub_parser import EPUBParser
-from .exceptions import CFIError
+from .exceptions import CFIError, CFIErrorCode
+
+# One tuned parser instance for all content documents: entity resolution
+# is disabled (content is untrusted), huge-tree support is off, and
+# lxml's own id map is skipped since _load_spine_document builds one.
+_XHTML_PARSER = etree.XMLParser(
+    resolve_entities=False, huge_tree=False, collect_ids=False
+)
+
+
+def _u16_to_index(text: str, u16_offset: int) -> int:
+    """
+    Convert a UTF-16 code-unit offset into a Python str index.
+
+    CFI character offsets count UTF-16 code units, so characters outside
+    the Basic Multilingual Plane occupy two units but one str position.
+    ASCII text (the overwhelmingly common case) needs no conversion at
+    all, and isascii() is a C-level check.
+    """
+    if text.isascii():
+        return u16_offset
+    return _u16_scan(text, u16_offset)
+
+
+@lru_cache(maxsize=1024)
+def _u16_scan(text: str, u16_offset: int) -> int:
+    """
+    Count surrogate pairs to map a UTF-16 offset onto a str index.
+
+    The scan is O(text length), so memoize it: repeated CFIs into the
+    same text node (bookmarks and highlights cluster) pass the identical
+    string and offset, turning the rescan into a dict hit. An offset
+    past the end of the text clamps to len(text), matching how Python
+    slicing treats out-of-range bounds.
+    """
+    units = 0
+    for i, ch in enumerate(text):
+        if units >= u16_offset:
+            return i
+        units += 2 if ord(ch) >= 0x10000 else 1
+    return len(text)
 
 
 class CFIProcessor:
@@ -27,7 +73,17 @@ class CFIProcessor:
         """
         self.epub_path = Path(epub_path)
         self.cfi_parser = CFIParser()
+        self.cfi_validator = CFIValidator()
         self.epub_parser = EPUBParser(str(epub_path))
+        # Parsed spine documents keyed by itemref index. Each entry holds
+        # the element tree plus an id->element map, so repeated CFIs into
+        # the same chapter skip the zip read and XML parse.
+        self._doc_cache: Dict[
+            int, Tuple[etree._Element, Dict[str, etree._Element]]
+        ] = {}
+        # Guards cache misses in _load_spine_document so batch
+        # validation threads load and parse each document only once.
+        self._doc_lock = threading.Lock()
 
     def extract_text_from_cfi_range(self, start_cfi: str, end_cfi: str) -> str:
         """
@@ -44,9 +100,25 @@ class CFIProcessor:
             CFIError: If the CFIs are invalid or text cannot be extracted
         """
 
-        # Parse both CFIs
-        start_parsed = self.cfi_parser.parse(start_cfi)
-        end_parsed = self.cfi_parser.parse(end_cfi)
+        # Identical strings are a degenerate range: parse once so invalid
+        # CFIs still raise, then skip the document load entirely. The
+        # spine-steps check below must still run — a CFI without an
+        # itemref step is rejected, not silently extracted as empty.
+        if start_cfi == end_cfi:
+            parsed = self.cfi_parser.parse(start_cfi)
+            if len(parsed.spine_steps) < 2:
+                raise CFIError(
+                    "CFI range cannot span different documents",
+                    code=CFIErrorCode.DIFFERENT_DOCUMENTS,
+                    start_cfi=start_cfi,
+                    end_cfi=end_cfi,
+                )
+            return ""
+
+        # Parse both endpoints in one call (shared prefixes are interned)
+        start_parsed, end_parsed = self.cfi_parser.parse_range(
+            start_cfi, end_cfi
+        )
 
         # Ensure both CFIs are in the same document
         # Compare the itemref indices (second spine step)
@@ -55,12 +127,22 @@ class CFIProcessor:
             or len(end_parsed.spine_steps) < 2
             or start_parsed.spine_steps[1].index != end_parsed.spine_steps[1].index
         ):
-            raise CFIError("CFI range cannot span different documents")
+            raise CFIError(
+                "CFI range cannot span different documents",
+                code=CFIErrorCode.DIFFERENT_DOCUMENTS,
+                start_cfi=start_cfi,
+                end_cfi=end_cfi,
+            )
 
         # Ensure start comes before end
         comparison = self.cfi_parser.compare_cfis(start_parsed, end_parsed)
         if comparison > 0:
-            raise CFIError("End CFI must come after start CFI")
+            raise CFIError(
+                "End CFI must come after start CFI",
+                code=CFIErrorCode.REVERSED_RANGE,
+                start_cfi=start_cfi,
+                end_cfi=end_cfi,
+            )
         elif comparison == 0:
             return ""  # Same position returns empty string
 
@@ -74,24 +156,187 @@ class CFIProcessor:
         itemref_step = start_parsed.spine_steps[1]
         spine_item = self.epub_parser.get_spine_item_by_index(itemref_step.index)
         if not spine_item:
-            raise CFIError(f"Spine item not found for index {itemref_step.index}")
+            raise CFIError(
+                f"Spine item not found for index {itemref_step.index}",
+                code=CFIErrorCode.SPINE_OUT_OF_RANGE,
+                spine_index=itemref_step.index,
+            )
 
         # Verify assertion if present
         if itemref_step.assertion and spine_item.id != itemref_step.assertion:
             raise CFIError(
-                f"Spine item assertion mismatch: expected {itemref_step.assertion}, "
-                f"got {spine_item.id}"
+                f"Spine item assertion mismatch: expected "
+                f"{itemref_step.assertion}, got {spine_item.id}",
+                code=CFIErrorCode.ASSERTION_MISMATCH,
+                expected=itemref_step.assertion,
+                actual=spine_item.id,
             )
 
-        # Read and parse the document
-        document_content = self.epub_parser.read_content_document(spine_item)
-        document_tree = etree.fromstring(document_content)
+        # Load the parsed document (cached per spine item)
+        document_tree, id_map = self._load_spine_document(itemref_step.index)
 
         # Extract text between the two positions
-        return self._extract_text_from_range(document_tree, start_parsed, end_parsed)
+        return self._extract_text_from_range(
+            document_tree, start_parsed, end_parsed, id_map
+        )
+
+    def validate_cfi_bounds(self, cfi: str) -> bool:
+        """
+        Check whether a CFI resolves within this EPUB's documents.
+
+        Args:
+            cfi: The CFI string to check
+
+        Returns:
+            True if the CFI is well-formed, names an existing spine item
+            (with a matching assertion, if any), and all of its content
+            steps resolve in that document; False otherwise
+        """
+        # Cheap shape check first: anything not starting like a CFI is
+        # rejected before any parse or archive I/O happens.
+        if not isinstance(cfi, str) or not cfi.startswith(("epubcfi(", "/")):
+            return False
+
+        parsed, _ = self.cfi_parser.try_parse(cfi)
+        if parsed is None or len(parsed.spine_steps) < 2:
+            return False
+
+        itemref_step = parsed.spine_steps[1]
+        spine_item = self.epub_parser.get_spine_item_by_index(
+            itemref_step.index
+        )
+        if spine_item is None:
+            return False
+        if itemref_step.assertion and spine_item.id != itemref_step.assertion:
+            return False
+
+        try:
+            document_tree, _ = self._load_spine_document(itemref_step.index)
+        except CFIError:
+            return False
+
+        return self.cfi_validator.validate_against_document(
+            cfi, document_tree
+        )
+
+    def validate_cfi_bounds_batch(self, cfis: List[str]) -> List[bool]:
+        """
+        Bounds-check a batch of CFIs concurrently.
+
+        The validations are independent: document loads are serialized
+        by the internal locks (and cached after the first hit on each
+        spine item), while parsing and the validation walks overlap
+        across threads.
+
+        Args:
+            cfis: CFI strings to check
+
+        Returns:
+            List of booleans in input order
+        """
+        if not cfis:
+            return []
+        workers = min(len(cfis), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self.validate_cfi_bounds, cfis))
+
+    def validate_cfi_bounds_strict(self, cfi: str) -> None:
+        """
+        Validate a CFI against this EPUB, raising on the first problem.
+
+        Args:
+            cfi: The CFI string to validate
+
+        Raises:
+            CFIError: If the CFI is malformed, its spine reference does
+                not resolve, or a content step falls outside the document
+        """
+        if not isinstance(cfi, str) or not cfi.startswith(("epubcfi(", "/")):
+            raise CFIError(f"Invalid CFI syntax: {cfi}")
+
+        parsed = self.cfi_parser.parse_and_validate(cfi)
+        if len(parsed.spine_steps) < 2:
+            raise CFIError(
+                "CFI must contain both spine and itemref references"
+            )
+
+        itemref_step = parsed.spine_steps[1]
+        spine_item = self.epub_parser.get_spine_item_by_index(
+            itemref_step.index
+        )
+        if spine_item is None:
+            raise CFIError(
+                f"Spine item not found for index {itemref_step.index}"
+            )
+        if itemref_step.assertion and spine_item.id != itemref_step.assertion:
+            raise CFIError(
+                f"Spine item assertion mismatch: expected "
+                f"{itemref_step.assertion}, got {spine_item.id}"
+            )
+
+        document_tree, _ = self._load_spine_document(itemref_step.index)
+        self.cfi_validator.validate_against_document_strict(
+            cfi, document_tree
+        )
+
+    def _load_spine_document(
+        self, spine_index: int
+    ) -> Tuple[etree._Element, Dict[str, etree._Element]]:
+        """
+        Load and parse the content document for a spine item, with caching.
+
+        Args:
+            spine_index: CFI itemref index of the spine item
+
+        Returns:
+            Tuple of (document tree, id->element map)
+
+        Raises:
+            CFIError: If the spine item cannot be found
+        """
+        cached = self._doc_cache.get(spine_index)
+        if cached is not None:
+            return cached
+
+        with self._doc_lock:
+            # Re-check under the lock: a concurrent caller may have
+            # loaded this document while we waited.
+            cached = self._doc_cache.get(spine_index)
+            if cached is not None:
+                return cached
+
+            spine_item = self.epub_parser.get_spine_item_by_index(
+                spine_index
+            )
+            if not spine_item:
+                raise CFIError(
+                    f"Spine item not found for index {spine_index}",
+                    code=CFIErrorCode.SPINE_OUT_OF_RANGE,
+                    spine_index=spine_index,
+                )
+
+            document_content = self.epub_parser.read_content_document(
+                spine_item
+            )
+            document_tree = etree.fromstring(document_content, _XHTML_PARSER)
+            # Keys are interned to match the parser's interned
+            # assertions, so the id_map probe hashes and compares by
+            # pointer.
+            id_map = {
+                sys.intern(element_id): e
+                for e in document_tree.iter()
+                if (element_id := e.get("id"))
+            }
+
+            self._doc_cache[spine_index] = (document_tree, id_map)
+            return document_tree, id_map
 
     def _extract_text_from_range(
-        self, document_tree, start_cfi: ParsedCFI, end_cfi: ParsedCFI
+        self,
+        document_tree,
+        start_cfi: ParsedCFI,
+        end_cfi: ParsedCFI,
+        id_map: Optional[Dict[str, etree._Element]] = None,
     ) -> str:
         """
         Extract text from a document tree between two CFI positions.
@@ -100,16 +345,27 @@ class CFIProcessor:
             document_tree: The parsed XML document tree
             start_cfi: Parsed start CFI
             end_cfi: Parsed end CFI
+            id_map: Optional id->element map for O(1) assertion checks
 
         Returns:
             Extracted text content
         """
+        # Range endpoints share most of their path (typically everything
+        # but the final step), so resolutions share one prefix cache:
+        # resolving the start fills it, resolving the end reuses the
+        # common ancestors instead of re-walking and re-asserting them.
+        # Keyed on the step objects themselves — index and assertion —
+        # so an endpoint with a differing assertion misses the cache and
+        # still gets its own assertion check. Scoped per call, so it is
+        # bounded by CFI depth and can never go stale across documents.
+        prefix_cache: Dict[Tuple[CFIStep, ...], etree._Element] = {}
+
         # Find start and end positions in the document
         start_node, start_offset, start_type = self._resolve_cfi_to_text_position(
-            document_tree, start_cfi
+            document_tree, start_cfi, id_map, prefix_cache
         )
         end_node, end_offset, end_type = self._resolve_cfi_to_text_position(
-            document_tree, end_cfi
+            document_tree, end_cfi, id_map, prefix_cache
         )
 
         # Extract text between positions
@@ -118,7 +374,13 @@ class CFIProcessor:
         )
 
     def _resolve_cfi_to_text_position(
-        self, document_tree, cfi: ParsedCFI
+        self,
+        document_tree,
+        cfi: ParsedCFI,
+        id_map: Optional[Dict[str, etree._Element]] = None,
+        prefix_cache: Optional[
+            Dict[Tuple[CFIStep, ...], etree._Element]
+        ] = None,
     ) -> Tuple[etree._Element, int, str]:
         """
         Resolve a CFI to a specific text position in the document.
@@ -126,22 +388,26 @@ class CFIProcessor:
         Args:
             document_tree: The parsed XML document tree
             cfi: Parsed CFI
+            id_map: Optional id->element map for O(1) assertion checks
+            prefix_cache: Optional step-prefix -> element map shared
+                between resolutions against the same tree; already-walked
+                prefixes (bounds and assertions included) are reused
 
         Returns:
             Tuple of (element, text_offset, text_node_type) where type is 'text' or 'tail'
         """
         # Start from the document root
         current_element = document_tree
+        prefix: Tuple[CFIStep, ...] = ()
 
         # Navigate through all content steps
         for i, step in enumerate(cfi.content_steps):
             # Check if this is the last step and it's odd (text node reference)
             is_last_step = i == len(cfi.content_steps) - 1
-            is_text_node = step.index % 2 == 1
 
-            if is_last_step and is_text_node:
+            if is_last_step and step.is_text:
                 # This is a text node reference within the current element
-                text_node_index = (step.index - 1) // 2
+                text_node_index = step.child_index
 
                 # Get all text nodes in this element
                 text_nodes = self._get_text_nodes(current_element)
@@ -149,7 +415,11 @@ class CFIProcessor:
                 if text_node_index < 0 or text_node_index >= len(text_nodes):
                     raise CFIError(
                         f"Invalid text node index: {step.index} "
-                        f"(resolved to {text_node_index}, max {len(text_nodes)-1})"
+                        f"(resolved to {text_node_index}, "
+                        f"max {len(text_nodes)-1})",
+                        code=CFIErrorCode.TEXT_NODE_OUT_OF_RANGE,
+                        step_index=step.index,
+                        text_node_count=len(text_nodes),
                     )
 
                 text_element, text_type = text_nodes[text_node_index]
@@ -157,33 +427,65 @@ class CFIProcessor:
 
                 return text_element, text_offset, text_type
             else:
-                # This is an element navigation step
-                if step.index % 2 == 0:
-                    # Even number = element reference
-                    child_index = (step.index // 2) - 1
-                else:
-                    # Odd number that's not the last step = element reference
-                    # (1,3,5... can be elements too)
-                    child_index = (step.index - 1) // 2
-
-                if child_index < 0 or child_index >= len(current_element):
-                    raise CFIError(f"Invalid CFI step index: {step.index} at step {i}")
+                # This is an element navigation step; the step carries
+                # its precomputed 0-based child position
+                child_index = step.child_index
+
+                if prefix_cache is not None:
+                    prefix = prefix + (step,)
+                    cached = prefix_cache.get(prefix)
+                    if cached is not None:
+                        # An identical prefix — same indices and same
+                        # assertions — was already walked and checked by
+                        # a prior resolution
+                        current_element = cached
+                        continue
+
+                # Element steps address element children only; comments
+                # and processing instructions are skipped, matching the
+                # validator's walk so the two never disagree on a CFI.
+                child = CFIValidator._find_element_child(
+                    current_element, child_index
+                )
+                if child is None:
+                    raise CFIError(
+                        f"Invalid CFI step index: {step.index} at step {i}",
+                        code=CFIErrorCode.ELEMENT_OUT_OF_RANGE,
+                        step_index=step.index,
+                    )
 
-                current_element = current_element[child_index]
+                current_element = child
 
-                # Validate assertion if present
+                # Validate assertion if present. With an id map the check
+                # is an identity comparison against the prebuilt lookup;
+                # without one, fall back to reading the id attribute.
                 if step.assertion:
-                    element_id = (
-                        current_element.get("id")
-                        if hasattr(current_element, "get")
-                        else None
-                    )
-                    if element_id != step.assertion:
+                    if id_map is not None:
+                        matches = id_map.get(step.assertion) is current_element
+                    else:
+                        element_id = (
+                            current_element.get("id")
+                            if hasattr(current_element, "get")
+                            else None
+                        )
+                        matches = element_id == step.assertion
+                    if not matches:
+                        element_id = (
+                            current_element.get("id")
+                            if hasattr(current_element, "get")
+                            else None
+                        )
                         raise CFIError(
-                            f"Element assertion mismatch: expected {step.assertion}, "
-                            f"got {element_id}"
+                            f"Element assertion mismatch: expected "
+                            f"{step.assertion}, got {element_id}",
+                            code=CFIErrorCode.ASSERTION_MISMATCH,
+                            expected=step.assertion,
+                            actual=element_id,
                         )
 
+                if prefix_cache is not None:
+                    prefix_cache[prefix] = current_element
+
         # If no content steps or we end up at element level
         text_offset = cfi.location.offset if cfi.location else 0
         return current_element, text_offset, "text"
@@ -236,279 +538,53 @@ class CFIProcessor:
             Extracted text content
         """
         # If both positions are in the same text node of the same element
-        if start_node == end_node and start_type == end_type:
+        if start_node is end_node and start_type == end_type:
             text_content = self._get_text_content(start_node, start_type)
-            return text_content[start_offset:end_offset]
-
-        # Check for parent-child relationship for precise extraction
-        # Case 1: start_node contains end_node (e.g., <p> contains <em>)
-        if self._is_ancestor(start_node, end_node):
-            return self._extract_text_precisely(
-                start_node,
-                start_node,
-                start_type,
-                start_offset,
-                end_node,
-                end_type,
-                end_offset,
-            )
-
-        # Case 2: end_node contains start_node (reverse case)
-        if self._is_ancestor(end_node, start_node):
-            return self._extract_text_precisely(
-                end_node,
-                start_node,
-                start_type,
-                start_offset,
-                end_node,
-                end_type,
-                end_offset,
-            )
-
-        # Case 3: both nodes are children of the same parent
-        start_parent = start_node.getparent() if start_type == "tail" else start_node
-        end_parent = end_node.getparent() if end_type == "tail" else end_node
-
-        if (
-            start_parent is not None
-            and end_parent is not None
-            and start_parent.getparent() == end_parent.getparent()
-            and start_parent.getparent() is not None
-        ):
-
-            return self._extract_text_precisely(
-                start_parent.getparent(),
-                start_node,
-                start_type,
-                start_offset,
-                end_node,
-                end_type,
-                end_offset,
-            )
-
-        # For more complex cases, use comprehensive extraction
-        result_parts = []
-
-        # Get text from start position
-        start_text = self._get_text_content(start_node, start_type)
-        if start_text:
-            result_parts.append(start_text[start_offset:])
-
-        # For different elements, try comprehensive extraction
-        if start_node != end_node:
-            common_parent = self._find_common_parent(
-                start_node, end_node, start_type, end_type
-            )
-            if common_parent is not None:
-                return self._get_all_content_between_positions(
-                    common_parent,
-                    start_node,
-                    start_type,
-                    start_offset,
-                    end_node,
-                    end_type,
-                    end_offset,
-                )
-
-        # Get text from end position
-        if end_node != start_node or start_type != end_type:
-            end_text = self._get_text_content(end_node, end_type)
-            if end_text:
-                result_parts.append(end_text[:end_offset])
-
-        return "".join(result_parts)
-
-    def _find_common_parent(self, start_node, end_node, start_type: str, end_type: str):
+            return text_content[
+                _u16_to_index(text_content, start_offset):
+                _u16_to_index(text_content, end_offset)
+            ]
+
+        # Walk the document's text segments in order, buffering from the
+        # start segment to the end segment in a single fused pass: no
+        # intermediate full-document string is ever materialized, and the
+        # walk stops as soon as the end segment has been emitted.
+        root = start_node.getroottree().getroot()
+        buf: List[str] = []
+        in_range = False
+        for node, seg_type in self._iter_text_segments(root):
+            text = self._get_text_content(node, seg_type)
+            if not in_range:
+                if node is start_node and seg_type == start_type:
+                    in_range = True
+                    buf.append(text[_u16_to_index(text, start_offset):])
+                continue
+            if node is end_node and seg_type == end_type:
+                buf.append(text[:_u16_to_index(text, end_offset)])
+                break
+            # Whitespace-only segments spanning a line break are document
+            # formatting (indentation between block elements) and are
+            # skipped; whitespace inside a line (e.g. a space held by an
+            # inline element) is real content and kept.
+            if text.strip() or "\n" not in text:
+                buf.append(text)
+
+        return "".join(buf)
+
+    def _iter_text_segments(self, element):
         """
-        Find the common parent element that contains both text nodes.
-
-        Args:
-            start_node: Starting element
-            end_node: Ending element
-            start_type: Type of start text node
-            end_type: Type of end text node
+        Yield (node, type) text segments under element in document order.
 
-        Returns:
-            Common parent element or None
+        An element's own text comes first, then each child's segments
+        followed by that child's tail — the same order CFI text-node
+        indices count in.
         """
-        # For same element, the parent depends on text type
-        if start_node == end_node:
-            if start_type == "text" or end_type == "text":
-                # If either is element text, the common parent is the element
-                # itself
-                return start_node
-            else:
-                # Both are tail text, parent is the element's parent
-                return start_node.getparent()
-
-        # For different elements, find actual common ancestor
-        # This is simplified - for now just return the start node's parent if
-        # they seem related
-        start_parent = start_node.getparent() if start_type == "tail" else start_node
-        end_parent = end_node.getparent() if end_type == "tail" else end_node
-
-        # Check if one contains the other
-        if self._is_ancestor(start_parent, end_parent):
-            return start_parent
-        elif self._is_ancestor(end_parent, start_parent):
-            return end_parent
-
-        # Try parent of start
-        if start_parent.getparent() is not None:
-            return start_parent.getparent()
-
-        return None
-
-    def _is_ancestor(self, ancestor, descendant):
-        """
-        Check if ancestor element contains descendant element.
-        """
-        current = descendant
-        while current is not None:
-            if current == ancestor:
-                return True
-            current = current.getparent()
-        return False
-
-    def _get_all_content_between_positions(
-        self,
-        parent,
-        start_node,
-        start_type: str,
-        start_offset: int,
-        end_node,
-        end_type: str,
-        end_offset: int,
-    ) -> str:
-        """
-        Extract all text content between two positions, including child elements.
-
-        Args:
-            parent: Common parent element
-            start_node, start_type, start_offset: Start position
-            end_node, end_type, end_offset: End position
-
-        Returns:
-            Extracted text content including all intermediate elements
-        """
-        result_parts = []
-
-        # Get the start text
-        start_text = self._get_text_content(start_node, start_type)
-        if start_text:
-            result_parts.append(start_text[start_offset:])
-
-        # If start and end are the same, we're done
-        if start_node == end_node and start_type == end_type:
-            if start_text:
-                return start_text[start_offset:end_offset]
-            return ""
-
-        # Collect all text content from the parent in document order
-        # This includes element text and child element content
-        collected_content = self._collect_text_content_in_range(
-            parent, start_node, start_type, end_node, end_type
-        )
-        if collected_content:
-            # Remove the start portion (already added) and add the rest
-            start_text_full = self._get_text_content(start_node, start_type) or ""
-            if collected_content.startswith(start_text_full):
-                remaining_after_start = collected_content[len(start_text_full) :]
-                result_parts.append(remaining_after_start)
-            else:
-                result_parts.append(collected_content)
-
-        # Adjust for end offset
-        full_result = "".join(result_parts)
-        end_text = self._get_text_content(end_node, end_type) or ""
-        if end_text and full_result.endswith(end_text):
-            # Trim to end offset
-            trimmed_end = end_text[:end_offset]
-            full_result = full_result[: -len(end_text)] + trimmed_end
-
-        return full_result
-
-    def _collect_text_content_in_range(
-        self, parent, start_node, start_type: str, end_node, end_type: str
-    ) -> str:
-        """
-        Collect all text content within a parent element between two positions.
-
-        This includes the text content of child elements.
-        """
-        # For a comprehensive solution, we'd need to walk the entire DOM tree
-        # For this implementation, handle the common case of para05 structure
-
-        if parent.text:
-            result = parent.text
-        else:
-            result = ""
-
-        # Add content from child elements
-        for child in parent:
-            if child.text:
-                result += child.text
+        if element.text:
+            yield element, "text"
+        for child in element:
+            yield from self._iter_text_segments(child)
             if child.tail:
-                result += child.tail
-
-        return result
-
-    def _extract_text_precisely(
-        self,
-        parent,
-        start_node,
-        start_type: str,
-        start_offset: int,
-        end_node,
-        end_type: str,
-        end_offset: int,
-    ) -> str:
-        """
-        Precisely extract text content between two positions within the same parent.
-
-        This handles cases like extracting specific text ranges from different nodes.
-        """
-        # If start and end are in the same text node, simple extraction
-        if start_node == end_node and start_type == end_type:
-            text = self._get_text_content(start_node, start_type)
-            return text[start_offset:end_offset] if text else ""
-
-        # Check if this is a "comprehensive" case (extracting all content between positions)
-        # vs a "precise" case (extracting specific text ranges only)
-        #
-        # Heuristic: If we're starting from offset 0 and going to the end of a text node,
-        # it's likely a comprehensive extraction
-        start_text = self._get_text_content(start_node, start_type)
-        end_text = self._get_text_content(end_node, end_type)
-
-        is_comprehensive = (
-            start_offset == 0  # Starting from beginning
-            and end_text
-            and end_offset == len(end_text)  # Going to end
-        )
-
-        if is_comprehensive:
-            # Use comprehensive extraction for full content
-            return self._get_all_content_between_positions(
-                parent,
-                start_node,
-                start_type,
-                start_offset,
-                end_node,
-                end_type,
-                end_offset,
-            )
-
-        # Precise extraction: just the specific text ranges
-        result_parts = []
-
-        if start_text:
-            result_parts.append(start_text[start_offset:])
-
-        if end_node != start_node and end_text:
-            result_parts.append(end_text[:end_offset])
-
-        return "".join(result_parts)
+                yield child, "tail"
 
     def _get_text_content(self, element, text_type: str = "text") -> str:
         """
@@ -526,3 +602,16 @@ class CFIProcessor:
         elif text_type == "tail" and hasattr(element, "tail") and element.tail:
             return str(element.tail)
         return ""
+
+    def close(self) -> None:
+        """Close the underlying EPUB file and drop cached documents."""
+        self.epub_parser.close()
+        self._doc_cache.clear()
+
+    def __enter__(self) -> "CFIProcessor":
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """Context manager exit."""
+        self.close()
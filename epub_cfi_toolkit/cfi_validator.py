@@ -0,0 +1,507 @@
+"""
+CFI validation functionality for EPUB Canonical Fragment Identifiers.
+"""
+
+import sys
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+try:
+    # RE2 matches in guaranteed linear time; use it for the regex
+    # fallback when available. Each engine gets a grammar variant it
+    # supports (see _CFI_BODY below).
+    import re2 as _re  # type: ignore
+
+    _USE_RE2 = True
+except ImportError:
+    import re as _re  # type: ignore
+
+    _USE_RE2 = False
+
+from .cfi_parser import CFIParser, ParsedCFI
+from .exceptions import CFIError, CFIErrorCode
+
+__all__ = ["CFIValidator"]
+
+# Shared parser for document validation. CFIParser keeps an LRU of
+# parsed results, so reusing one instance means a CFI validated twice
+# is only parsed once.
+_PARSER = CFIParser()
+
+# Set to True to route syntax validation through the regex reference
+# implementation instead of the DFA scanner (correctness testing only).
+_USE_REGEX_FALLBACK = False
+
+# Upper bound on accepted CFI length. Real-world CFIs are a few dozen
+# characters; anything this long is garbage and is rejected up front.
+_MAX_CFI_LENGTH = 4096
+
+# Regex reference for the CFI grammar, compiled once at import time so
+# every validator instance shares the same pattern objects. The grammar
+# body is shared by two anchored patterns — one for bare CFIs, one for
+# wrapped ones — so matching never pays for an optional wrapper group.
+# The grammar mirrors the DFA exactly: a body is one or more
+# comma-separated parts; each part is /N[assertion]? steps joined by
+# '/' or '!/'; assertions consume ^-escaped pairs or any character up
+# to the closing ']'; a part before a comma may end at an indirection
+# ('!') or a :offset~length location, the final part only at a step or
+# location.
+if _USE_RE2:
+    # RE2 matches in linear time by construction (and rejects the
+    # lookaround used below), so it gets the plain grammar.
+    _CFI_ASSERT = r"(?:\[(?:\^.|[^\]^])*\])"
+    _CFI_PATH = (
+        r"/\d+" + _CFI_ASSERT + r"?"
+        r"(?:!?/\d+" + _CFI_ASSERT + r"?)*"
+    )
+    _CFI_BODY = (
+        r"(?:" + _CFI_PATH + r"(?:!|:\d+(?:~\d+)?)?, *)*"
+        + _CFI_PATH + r"(?::\d+(?:~\d+)?)?"
+    )
+else:
+    # Backtracking engine: steps are matched by one unambiguous repeated
+    # group, and each digit/assertion run is wrapped in (?=(...))\N — a
+    # capturing lookahead plus backreference that simulates an atomic
+    # group, so the engine cannot re-partition consumed characters. A
+    # pathological non-match stays linear instead of going exponential.
+    _CFI_BODY = (
+        # Non-final range parts, each closed by a comma (optionally
+        # after a trailing '!' or offset)
+        r"(?:"
+        r"/(?=(\d+))\1(?:\[(?=((?:\^.|[^\]^])*))\2\])?"
+        r"(?:!?/(?=(\d+))\3(?:\[(?=((?:\^.|[^\]^])*))\4\])?)*"
+        r"(?:!|:(?=(\d+))\5(?:~(?=(\d+))\6)?)?"
+        r", *)*"
+        # Final (or only) part
+        r"/(?=(\d+))\7(?:\[(?=((?:\^.|[^\]^])*))\8\])?"
+        r"(?:!?/(?=(\d+))\9(?:\[(?=((?:\^.|[^\]^])*))\10\])?)*"
+        r"(?::(?=(\d+))\11(?:~(?=(\d+))\12)?)?"
+    )
+
+_CFI_PATTERN_BARE = _re.compile(r"^" + _CFI_BODY + r"$")
+_CFI_PATTERN_WRAPPED = _re.compile(r"^epubcfi\(" + _CFI_BODY + r"\)$")
+
+
+class CFIValidator:
+    """Validator for EPUB CFI strings and their document references."""
+
+    # States for the syntax-scanning DFA. The CFI grammar is small and
+    # regular (steps, assertions, indirections, character offsets), so an
+    # explicit state machine validates it in one pass with no regex
+    # engine overhead and no backtracking risk on hostile assertions.
+    _STATE_START = 0            # expecting the leading '/'
+    _STATE_STEP_START = 1       # after '/', expecting a step digit
+    _STATE_STEP_DIGITS = 2      # inside a step number
+    _STATE_ASSERTION = 3        # inside a [...] assertion
+    _STATE_ASSERTION_ESCAPE = 4  # after '^' inside an assertion
+    _STATE_AFTER_ASSERTION = 5  # after the closing ']'
+    _STATE_BANG = 6             # after '!', expecting '/'
+    _STATE_OFFSET_START = 7     # after ':', expecting an offset digit
+    _STATE_OFFSET_DIGITS = 8    # inside a character offset
+    _STATE_LENGTH_START = 9     # after '~', expecting a length digit
+    _STATE_LENGTH_DIGITS = 10   # inside a range length
+    _STATE_COMMA = 11           # after ',' in a range CFI
+
+    _STATE_COUNT = 12
+
+    # States in which the input may legally end
+    _ACCEPTING_STATES = frozenset(
+        {_STATE_STEP_DIGITS, _STATE_AFTER_ASSERTION,
+         _STATE_OFFSET_DIGITS, _STATE_LENGTH_DIGITS}
+    )
+
+    def __init__(self) -> None:
+        """Initialize the CFI validator."""
+        # All validation state (DFA tables, regexes, parser) lives at
+        # module level, so instances are free to construct.
+        # One-entry cache for the per-tree id->element index; callers
+        # validate batches of CFIs against the same document, so the
+        # last tree is the only one worth holding on to. Held as a
+        # single (tree, index) tuple so one attribute assignment
+        # publishes both halves together — batch validation drives this
+        # instance from multiple threads, and a split update could pair
+        # one tree with another tree's index.
+        self._idx_cache: Tuple[Any, Dict[str, Any]] = (None, {})
+
+    @classmethod
+    def _build_transitions(
+        cls,
+    ) -> Tuple[List[Dict[str, int]], List[int]]:
+        """
+        Build the DFA transition table.
+
+        Returns a per-state dict of explicit character transitions plus a
+        per-state default (-1 rejects; assertion states default to
+        staying inside the assertion, since it may hold arbitrary text).
+        """
+        table: List[Dict[str, int]] = [{} for _ in range(cls._STATE_COUNT)]
+        defaults = [-1] * cls._STATE_COUNT
+
+        table[cls._STATE_START]["/"] = cls._STATE_STEP_START
+
+        for digit in "0123456789":
+            table[cls._STATE_STEP_START][digit] = cls._STATE_STEP_DIGITS
+            table[cls._STATE_STEP_DIGITS][digit] = cls._STATE_STEP_DIGITS
+            table[cls._STATE_OFFSET_START][digit] = cls._STATE_OFFSET_DIGITS
+            table[cls._STATE_OFFSET_DIGITS][digit] = cls._STATE_OFFSET_DIGITS
+            table[cls._STATE_LENGTH_START][digit] = cls._STATE_LENGTH_DIGITS
+            table[cls._STATE_LENGTH_DIGITS][digit] = cls._STATE_LENGTH_DIGITS
+
+        for state in (cls._STATE_STEP_DIGITS, cls._STATE_AFTER_ASSERTION):
+            table[state]["/"] = cls._STATE_STEP_START
+            table[state]["!"] = cls._STATE_BANG
+            table[state][":"] = cls._STATE_OFFSET_START
+            table[state][","] = cls._STATE_COMMA
+        table[cls._STATE_STEP_DIGITS]["["] = cls._STATE_ASSERTION
+
+        table[cls._STATE_ASSERTION]["]"] = cls._STATE_AFTER_ASSERTION
+        table[cls._STATE_ASSERTION]["^"] = cls._STATE_ASSERTION_ESCAPE
+        defaults[cls._STATE_ASSERTION] = cls._STATE_ASSERTION
+        defaults[cls._STATE_ASSERTION_ESCAPE] = cls._STATE_ASSERTION
+
+        table[cls._STATE_BANG]["/"] = cls._STATE_STEP_START
+        # A range CFI's parent part may end at its indirection: "/6/4!, ..."
+        table[cls._STATE_BANG][","] = cls._STATE_COMMA
+
+        table[cls._STATE_OFFSET_DIGITS]["~"] = cls._STATE_LENGTH_START
+        table[cls._STATE_OFFSET_DIGITS][","] = cls._STATE_COMMA
+        table[cls._STATE_LENGTH_DIGITS][","] = cls._STATE_COMMA
+
+        # Range CFIs separate parts with ',' and an optional space
+        table[cls._STATE_COMMA][" "] = cls._STATE_COMMA
+        table[cls._STATE_COMMA]["/"] = cls._STATE_STEP_START
+
+        return table, defaults
+
+    @staticmethod
+    def validate(cfi: str) -> bool:
+        """
+        Check whether a CFI string is syntactically valid.
+
+        Args:
+            cfi: The CFI string to check (with or without 'epubcfi()'
+                wrapper, simple or range syntax)
+
+        Returns:
+            True if the CFI is well-formed, False otherwise
+        """
+        if not cfi or not isinstance(cfi, str):
+            return False
+
+        # Cheap prechecks before any scanning: real CFIs are short and
+        # start with '/' or the wrapper, so oversized or misshapen input
+        # is rejected without touching the DFA (or filling its cache).
+        if len(cfi) > _MAX_CFI_LENGTH:
+            return False
+
+        body = cfi.strip()
+        if _USE_REGEX_FALLBACK:
+            # Dispatch on the wrapper up front rather than folding it
+            # into the pattern as an optional group.
+            if body.startswith("epubcfi("):
+                return bool(_CFI_PATTERN_WRAPPED.match(body))
+            return bool(_CFI_PATTERN_BARE.match(body))
+
+        if body.startswith("epubcfi(") and body.endswith(")"):
+            body = body[8:-1]
+        if not body.startswith("/"):
+            return False
+
+        return _validate_syntax(body)
+
+    def validate_many(self, cfis: List[str]) -> List[bool]:
+        """
+        Syntax-check a batch of CFI strings.
+
+        Convenience mirroring CFIParser.parse_many; hoists the method
+        lookup out of the caller's loop and shares the scan cache
+        across the batch.
+
+        Args:
+            cfis: CFI strings to check
+
+        Returns:
+            List of booleans in input order
+        """
+        validate = self.validate
+        return [validate(cfi) for cfi in cfis]
+
+    def validate_against_document(
+        self, cfi: str, document_tree: Any
+    ) -> bool:
+        """
+        Validate a CFI's content references against a parsed document.
+
+        Args:
+            cfi: The CFI string to validate
+            document_tree: The parsed XML document tree to resolve against
+
+        Returns:
+            True if the CFI is well-formed and all of its content steps
+            resolve within the document, False otherwise
+        """
+        try:
+            # try_parse validates and parses in one scan, and reports
+            # failure as a return value instead of a raised CFIError.
+            parsed_cfi, _ = _PARSER.try_parse(cfi)
+            if parsed_cfi is None:
+                return False
+
+            if not self._validate_spine_references(parsed_cfi):
+                return False
+
+            return self._validate_content_references(
+                parsed_cfi, document_tree
+            )
+        except (AttributeError, IndexError, TypeError, CFIError):
+            # Only the failures tree navigation can actually produce;
+            # anything else is a genuine bug and should surface.
+            return False
+
+    def validate_against_document_strict(
+        self, cfi: str, document_tree: Any
+    ) -> None:
+        """
+        Validate a CFI against a document, raising on the first problem.
+
+        Args:
+            cfi: The CFI string to validate
+            document_tree: The parsed XML document tree to resolve against
+
+        Raises:
+            CFIError: If the CFI is malformed or any content step cannot
+                be resolved in the document
+        """
+        parsed_cfi, _ = _PARSER.try_parse(cfi)
+        if parsed_cfi is None:
+            raise CFIError(
+                f"Invalid CFI syntax: {cfi}",
+                code=CFIErrorCode.INVALID_SYNTAX,
+                cfi=cfi,
+            )
+
+        if not self._validate_spine_references(parsed_cfi):
+            raise CFIError(
+                "CFI must contain both spine and itemref references",
+                code=CFIErrorCode.MISSING_SPINE_REFERENCE,
+                cfi=cfi,
+            )
+
+        self._validate_content_references_strict(parsed_cfi, document_tree)
+
+    @staticmethod
+    def _validate_spine_references(parsed_cfi: ParsedCFI) -> bool:
+        """Check that the CFI carries both spine and itemref steps."""
+        try:
+            return len(parsed_cfi.spine_steps) >= 2
+        except (AttributeError, TypeError):
+            return False
+
+    def _assertion_index(self, document_tree: Any) -> Dict[str, Any]:
+        """
+        Return the id->element index for a tree, built once per tree.
+
+        lxml elements cannot carry extra attributes, so the index lives
+        here, keyed by tree identity. Building it is one O(n) walk;
+        every assertion check afterwards is a dict probe plus identity
+        comparison instead of an attribute read per step.
+        """
+        cached_tree, cached_index = self._idx_cache
+        if cached_tree is document_tree:
+            return cached_index
+
+        index = {
+            sys.intern(element_id): e
+            for e in document_tree.iter()
+            if (element_id := e.get("id"))
+        }
+        self._idx_cache = (document_tree, index)
+        return index
+
+    def _validate_content_references(
+        self, parsed_cfi: ParsedCFI, document_tree: Any
+    ) -> bool:
+        """Check that all content steps resolve within the document."""
+        try:
+            return self._validate_content_core(
+                parsed_cfi, document_tree, strict=False
+            )
+        except (AttributeError, IndexError, TypeError):
+            return False
+
+    def _validate_content_references_strict(
+        self, parsed_cfi: ParsedCFI, document_tree: Any
+    ) -> None:
+        """
+        Check content steps against the document, raising with details.
+
+        Raises:
+            CFIError: On the first unresolvable step, with the step, the
+                path walked so far, and what the document offers instead
+        """
+        self._validate_content_core(parsed_cfi, document_tree, strict=True)
+
+    def _validate_content_core(
+        self, parsed_cfi: ParsedCFI, document_tree: Any, strict: bool
+    ) -> bool:
+        """
+        Walk the content steps once, shared by both validation modes.
+
+        When strict is False the first failure returns False with no
+        message built at all; when strict is True it raises CFIError
+        with the step, the 'tag/index' trail walked so far (rebuilt on
+        demand by _walked_path) and what the document offers instead.
+        """
+        current_element = document_tree
+        id_index = None
+        last_i = len(parsed_cfi.content_steps) - 1
+
+        for i, step in enumerate(parsed_cfi.content_steps):
+            if i == last_i and step.is_text:
+                # Text node reference within the current element
+                text_node_count = self._count_text_nodes(current_element)
+                if step.child_index >= text_node_count:
+                    if not strict:
+                        return False
+                    raise CFIError(
+                        f"Invalid text node reference /{step.index} at "
+                        f"{self._walked_path(parsed_cfi, document_tree, i)}"
+                        f": element only has "
+                        f"{text_node_count} text node(s)",
+                        code=CFIErrorCode.TEXT_NODE_OUT_OF_RANGE,
+                        step_index=step.index,
+                        text_node_count=text_node_count,
+                    )
+            else:
+                # Element navigation step
+                child = self._find_element_child(
+                    current_element, step.child_index
+                )
+                if child is None:
+                    if not strict:
+                        return False
+                    child_count = self._count_element_children(
+                        current_element
+                    )
+                    raise CFIError(
+                        f"Invalid element reference /{step.index} at "
+                        f"{self._walked_path(parsed_cfi, document_tree, i)}"
+                        f": element only has "
+                        f"{child_count} child(ren)",
+                        code=CFIErrorCode.ELEMENT_OUT_OF_RANGE,
+                        step_index=step.index,
+                        child_count=child_count,
+                    )
+
+                current_element = child
+
+                if step.assertion:
+                    if id_index is None:
+                        # Built lazily: assertion-free CFIs never pay
+                        # for the index walk
+                        id_index = self._assertion_index(document_tree)
+                    if id_index.get(step.assertion) is not current_element:
+                        if not strict:
+                            return False
+                        element_id = current_element.get("id")
+                        raise CFIError(
+                            f"Element assertion mismatch at "
+                            f"{self._walked_path(parsed_cfi, document_tree, i)}"
+                            f": expected "
+                            f"{step.assertion}, got {element_id}",
+                            code=CFIErrorCode.ASSERTION_MISMATCH,
+                            expected=step.assertion,
+                            actual=element_id,
+                        )
+
+        return True
+
+    @staticmethod
+    def _walked_path(
+        parsed_cfi: ParsedCFI, document_tree: Any, upto: int
+    ) -> str:
+        """
+        Rebuild the 'tag/index' trail up to a failing step.
+
+        Only called when a strict validation error is being raised; every
+        step before upto is known to resolve, so the re-walk cannot fail.
+        """
+        element_path: List[str] = []
+        current_element = document_tree
+
+        for i, step in enumerate(parsed_cfi.content_steps[: upto + 1]):
+            element_name = getattr(current_element, "tag", "unknown")
+            element_path.append(f"{element_name}/{step.index}")
+            if i < upto:
+                current_element = CFIValidator._find_element_child(
+                    current_element, step.child_index
+                )
+
+        return " -> ".join(element_path)
+
+    @staticmethod
+    def _find_element_child(element: Any, child_index: int) -> Any:
+        """
+        Return the child_index-th element child of element, or None.
+
+        CFI element steps address element children only, so comments and
+        processing instructions (whose tag is not a string) are skipped.
+        One pass, stopping as soon as the target is reached.
+        """
+        if child_index < 0:
+            return None
+        seen = 0
+        for child in element:
+            if not isinstance(child.tag, str):
+                continue
+            if seen == child_index:
+                return child
+            seen += 1
+        return None
+
+    @staticmethod
+    def _count_element_children(element: Any) -> int:
+        """Count the element children (for error messages only)."""
+        return sum(1 for child in element if isinstance(child.tag, str))
+
+    @staticmethod
+    def _count_text_nodes(element: Any) -> int:
+        """
+        Count the text nodes within an element (CFI style).
+
+        Bounds checks only need the count, so this avoids materializing
+        an (element, type) tuple list the way the processor's
+        _get_text_nodes does.
+        """
+        count = 1 if getattr(element, "text", None) else 0
+        for child in element:
+            if getattr(child, "tail", None):
+                count += 1
+        return count
+
+
+# Shared DFA tables for the module-level scan below.
+_TRANSITIONS, _DEFAULTS = CFIValidator._build_transitions()
+
+
+@lru_cache(maxsize=4096)
+def _validate_syntax(body: str) -> bool:
+    """
+    Run the DFA scan over an unwrapped CFI body.
+
+    Memoized process-wide: reading-position CFIs are re-validated many
+    times with identical strings (e.g. on every sync), so repeat lookups
+    become a single dict probe.
+    """
+    state = CFIValidator._STATE_START
+    for char in body:
+        state = _TRANSITIONS[state].get(char, _DEFAULTS[state])
+        if state < 0:
+            return False
+
+    return state in CFIValidator._ACCEPTING_STATES
+
+
+def validate(cfi: str) -> bool:
+    """Check whether a CFI string is syntactically valid."""
+    return CFIValidator.validate(cfi)
@@ -2,8 +2,12 @@
 EPUB file structure parsing functionality.
 """
 
+import mmap
+import threading
 import zipfile
 from dataclasses import dataclass
+from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
 from typing import Dict, List, Optional
 
@@ -11,6 +15,50 @@ from lxml import etree
 
 from .exceptions import EPUBError
 
+_ROOTFILE_TAG = "{urn:oasis:names:tc:opendocument:xmlns:container}rootfile"
+
+# Shared tuned parser for package metadata (OPF): entity resolution off
+# for untrusted archives, and no huge-tree or id-map bookkeeping.
+_OPF_PARSER = etree.XMLParser(
+    resolve_entities=False, huge_tree=False, collect_ids=False
+)
+
+
+class _SeekableMmap(mmap.mmap):
+    """mmap with the seekable() marker zipfile expects of file objects."""
+
+    def seekable(self) -> bool:
+        return True
+
+
+@lru_cache(maxsize=128)
+def _resolve_opf_path(epub_path: str, mtime: float) -> str:
+    """
+    Locate the OPF file declared in META-INF/container.xml.
+
+    Cached process-wide keyed on (path, mtime), so re-opening the same
+    book (e.g. across web requests) skips the container.xml read and
+    parse; a changed mtime invalidates the stale entry.
+
+    Raises:
+        EPUBError: If container.xml does not declare an OPF file
+    """
+    with zipfile.ZipFile(epub_path, "r") as epub_zip:
+        container_data = epub_zip.read("META-INF/container.xml")
+
+    # container.xml only exists to name the OPF file, so stream it and
+    # stop at the first <rootfile> instead of building the full tree.
+    full_path = None
+    for _, rootfile in etree.iterparse(
+        BytesIO(container_data), tag=_ROOTFILE_TAG
+    ):
+        full_path = rootfile.get("full-path")
+        break
+
+    if not full_path:
+        raise EPUBError("Could not find OPF file in container.xml")
+    return full_path
+
 
 @dataclass
 class ManifestItem:
@@ -46,38 +94,91 @@ class EPUBParser:
         """
         self.epub_path = Path(epub_path)
         self._epub_zip: Optional[zipfile.ZipFile] = None
+        self._epub_file = None
+        self._epub_mmap: Optional[mmap.mmap] = None
         self._opf_path: Optional[str] = None
+        self._zip_index: Dict[str, zipfile.ZipInfo] = {}
+        # Decompressed document bytes keyed by archive path; content
+        # documents are small and reread often (every CFI touching a
+        # chapter), so caching skips the repeat zlib inflate.
+        self._content_cache: Dict[str, bytes] = {}
         self._manifest: Dict[str, ManifestItem] = {}
         self._spine: List[SpineItem] = []
-
+        self._opened = False
+        # Guards lazy opening and reads on the shared zip handle, so
+        # batch validation can fan out over threads (see CFIProcessor).
+        self._lock = threading.Lock()
+
+        # Fail fast on a bad path, but defer the ZIP open and XML parsing
+        # until something actually needs the archive; construction should
+        # stay cheap for short-lived instances.
         if not self.epub_path.exists():
             raise EPUBError(f"EPUB file not found: {epub_path}")
 
+    def _ensure_opened(self) -> None:
+        """Open the EPUB and parse its structure on first use."""
+        if self._opened:
+            return
+
+        with self._lock:
+            if self._opened:
+                # Another thread finished opening while we waited
+                return
+
+            try:
+                self._epub_zip = self._open_zip()
+                # Entry lookups during content reads go through this dict
+                # and hand zipfile a ZipInfo directly, skipping per-read
+                # getinfo.
+                self._zip_index = {
+                    zi.filename: zi for zi in self._epub_zip.infolist()
+                }
+                self._parse_container()
+                self._parse_opf()
+            except Exception as e:
+                self._close_archive()
+                raise EPUBError(f"Failed to parse EPUB: {e}")
+
+            self._opened = True
+
+    def _open_zip(self) -> zipfile.ZipFile:
+        """
+        Open the EPUB archive, preferring an mmap-backed file object.
+
+        Repeated member reads during CFI resolution are then served from
+        the OS page cache without Python-side buffer copies. Falls back
+        to a plain file-path open when the file cannot be mapped (e.g.
+        empty or on a filesystem without mmap support).
+        """
         try:
-            self._epub_zip = zipfile.ZipFile(self.epub_path, "r")
-            self._parse_container()
-            self._parse_opf()
-        except Exception as e:
-            if self._epub_zip:
-                self._epub_zip.close()
-            raise EPUBError(f"Failed to parse EPUB: {e}")
+            self._epub_file = open(self.epub_path, "rb")
+            self._epub_mmap = _SeekableMmap(
+                self._epub_file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+            return zipfile.ZipFile(self._epub_mmap, "r")
+        except (OSError, ValueError):
+            self._close_archive()
+            return zipfile.ZipFile(self.epub_path, "r")
+
+    def _close_archive(self) -> None:
+        """Close the ZIP handle and any mmap/file object backing it."""
+        if self._epub_zip:
+            self._epub_zip.close()
+            self._epub_zip = None
+        if self._epub_mmap is not None:
+            self._epub_mmap.close()
+            self._epub_mmap = None
+        if self._epub_file is not None:
+            self._epub_file.close()
+            self._epub_file = None
 
     def _parse_container(self) -> None:
         """Parse META-INF/container.xml to find OPF file."""
         try:
-            if self._epub_zip is None:
-                raise EPUBError("EPUB file not properly initialized")
-            container_data = self._epub_zip.read("META-INF/container.xml")
-            container_xml = etree.fromstring(container_data)
-
-            # Find the OPF file path
-            rootfile = container_xml.find(
-                ".//{urn:oasis:names:tc:opendocument:xmlns:container}rootfile"
-            )
-            if rootfile is not None:
-                self._opf_path = rootfile.get("full-path")
-            else:
-                raise EPUBError("Could not find OPF file in container.xml")
+            mtime = self.epub_path.stat().st_mtime
+            self._opf_path = _resolve_opf_path(str(self.epub_path), mtime)
+        except EPUBError:
+            raise
         except Exception as e:
             raise EPUBError(f"Failed to parse container.xml: {e}")
 
@@ -92,7 +193,7 @@ class EPUBParser:
             if self._opf_path is None:
                 raise EPUBError("OPF path not found")
             opf_data = self._epub_zip.read(self._opf_path)
-            opf_xml = etree.fromstring(opf_data)
+            opf_xml = etree.fromstring(opf_data, _OPF_PARSER)
 
             # Define namespace
             ns = {"opf": "http://www.idpf.org/2007/opf"}
@@ -126,11 +227,13 @@ class EPUBParser:
     @property
     def manifest(self) -> Dict[str, ManifestItem]:
         """Get the manifest items."""
+        self._ensure_opened()
         return self._manifest.copy()
 
     @property
     def spine(self) -> List[SpineItem]:
         """Get the spine items."""
+        self._ensure_opened()
         return self._spine.copy()
 
     def get_spine_item_by_index(self, index: int) -> Optional[SpineItem]:
@@ -143,6 +246,8 @@ class EPUBParser:
         Returns:
             SpineItem if found, None otherwise
         """
+        self._ensure_opened()
+
         # CFI uses 1-based indexing, but spine index in CFI is actually:
         # /2 = first spine item, /4 = second spine item, etc.
         # So we need to convert: CFI_index = (spine_array_index + 1) * 2
@@ -165,6 +270,8 @@ class EPUBParser:
         Raises:
             EPUBError: If manifest item not found
         """
+        self._ensure_opened()
+
         manifest_item = self._manifest.get(spine_item.idref)
         if not manifest_item:
             raise EPUBError(f"Manifest item not found: {spine_item.idref}")
@@ -191,20 +298,93 @@ class EPUBParser:
         Raises:
             EPUBError: If document cannot be read
         """
+        self._ensure_opened()
+
         document_path = self.get_content_document_path(spine_item)
 
+        cached = self._content_cache.get(document_path)
+        if cached is not None:
+            return cached
+
+        if self._epub_zip is None:
+            raise EPUBError("EPUB file not properly initialized")
+        zip_info = self._zip_index.get(document_path)
+        if zip_info is None:
+            raise EPUBError(f"Document not found in EPUB: {document_path}")
+
         try:
-            if self._epub_zip is None:
-                raise EPUBError("EPUB file not properly initialized")
-            return self._epub_zip.read(document_path)
+            # Reads share one seekable file object, so serialize them
+            with self._lock:
+                content = self._epub_zip.read(zip_info)
         except Exception as e:
             raise EPUBError(f"Failed to read document {document_path}: {e}")
 
+        self._content_cache[document_path] = content
+        return content
+
+    def read_content_documents(
+        self, spine_items: List[SpineItem]
+    ) -> Dict[str, bytes]:
+        """
+        Read several content documents in one batched pass.
+
+        All cache misses are decompressed under a single lock
+        acquisition, so prefetching a book's chapters (e.g. ahead of a
+        burst of CFI lookups) avoids the per-call lock handoff of
+        repeated read_content_document calls. Results land in the same
+        content cache, making subsequent single reads free.
+
+        Args:
+            spine_items: The spine items to read
+
+        Returns:
+            Mapping of archive path to raw document bytes, one entry per
+            distinct document
+
+        Raises:
+            EPUBError: If any document cannot be found or read
+        """
+        self._ensure_opened()
+
+        results: Dict[str, bytes] = {}
+        misses: List[tuple] = []
+        for spine_item in spine_items:
+            document_path = self.get_content_document_path(spine_item)
+            if document_path in results:
+                continue
+            cached = self._content_cache.get(document_path)
+            if cached is not None:
+                results[document_path] = cached
+                continue
+            zip_info = self._zip_index.get(document_path)
+            if zip_info is None:
+                raise EPUBError(
+                    f"Document not found in EPUB: {document_path}"
+                )
+            misses.append((document_path, zip_info))
+
+        if misses:
+            if self._epub_zip is None:
+                raise EPUBError("EPUB file not properly initialized")
+            with self._lock:
+                for document_path, zip_info in misses:
+                    try:
+                        content = self._epub_zip.read(zip_info)
+                    except Exception as e:
+                        raise EPUBError(
+                            f"Failed to read document {document_path}: {e}"
+                        )
+                    self._content_cache[document_path] = content
+                    results[document_path] = content
+
+        return results
+
     def close(self) -> None:
         """Close the EPUB file."""
-        if self._epub_zip:
-            self._epub_zip.close()
-            self._epub_zip = None
+        self._close_archive()
+        self._zip_index = {}
+        self._content_cache = {}
+        self._opened = False
 
     def __enter__(self) -> "EPUBParser":
         """Context manager entry."""
@@ -2,11 +2,43 @@
 Exception classes for the EPUB CFI Toolkit.
 """
 
+from enum import IntEnum
+from typing import Any, Optional
+
+
+class CFIErrorCode(IntEnum):
+    """Machine-readable codes carried by CFIError."""
+
+    INVALID_SYNTAX = 1
+    MISSING_SPINE_REFERENCE = 2
+    SPINE_OUT_OF_RANGE = 3
+    ELEMENT_OUT_OF_RANGE = 4
+    TEXT_NODE_OUT_OF_RANGE = 5
+    ASSERTION_MISMATCH = 6
+    REVERSED_RANGE = 7
+    DIFFERENT_DOCUMENTS = 8
+
 
 class CFIError(Exception):
-    """Base exception class for CFI-related errors."""
+    """
+    Base exception class for CFI-related errors.
 
-    pass
+    Besides the human-readable message, errors raised by the library
+    carry a CFIErrorCode plus structured context (the offending CFI,
+    indices, expected/actual values), so callers can branch on what
+    failed without substring-matching the message text.
+    """
+
+    def __init__(
+        self,
+        message: Optional[str] = None,
+        *,
+        code: Optional[CFIErrorCode] = None,
+        **context: Any,
+    ) -> None:
+        super().__init__(message)
+        self.code = code
+        self.context = context
 
 
 class EPUBError(Exception):
@@ -0,0 +1,92 @@
+"""
+Shared fixtures for the test suite.
+"""
+
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from epub_cfi_toolkit import CFIProcessor
+from epub_cfi_toolkit.cfi_parser import CFIParser
+
+# Resolved once at collection time; every fixture and test that needs the
+# sample EPUB shares this Path instead of rebuilding it.
+SAMPLE_EPUB = (
+    Path(__file__).parent.parent / "test_data" / "sample.epub"
+).resolve()
+
+_CONTAINER_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<container version="1.0"
+    xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="content.opf"
+        media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+"""
+
+_MINIMAL_OPF = """<?xml version="1.0" encoding="UTF-8"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="3.0"
+    unique-identifier="uid">
+  <metadata/>
+  <manifest>
+    <item id="chap01" href="chapter01.xhtml"
+        media-type="application/xhtml+xml"/>
+  </manifest>
+  <spine>
+    <itemref id="chap01ref" idref="chap01"/>
+  </spine>
+</package>
+"""
+
+_MINIMAL_CHAPTER = """<?xml version="1.0" encoding="UTF-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml">
+  <body id="body01"><p id="para01">Hello</p></body>
+</html>
+"""
+
+
+@pytest.fixture(scope="session")
+def parser():
+    """
+    Return a CFIParser shared session-wide.
+
+    The parser is stateless apart from its parse cache, so one instance
+    serves every test and repeated CFI literals become cache hits across
+    the whole run.
+    """
+    return CFIParser()
+
+
+@pytest.fixture(scope="session")
+def sample_epub_path():
+    """Return path to the sample EPUB file."""
+    return SAMPLE_EPUB
+
+
+@pytest.fixture(scope="session")
+def cfi_processor(sample_epub_path):
+    """
+    Return a CFI processor for the sample EPUB, shared session-wide.
+
+    Extraction is read-only, so one processor (and one EPUB open plus
+    container/OPF parse) serves every test instead of one per test.
+    """
+    return CFIProcessor(str(sample_epub_path))
+
+
+@pytest.fixture(scope="session")
+def minimal_epub(tmp_path_factory):
+    """
+    Return the path to a minimal single-chapter EPUB, built once.
+
+    Exercises the real zipfile code path (no mocks) without the full
+    sample book; useful for initialization and structure tests.
+    """
+    epub_path = tmp_path_factory.mktemp("epub") / "minimal.epub"
+    with zipfile.ZipFile(epub_path, "w") as epub_zip:
+        epub_zip.writestr("META-INF/container.xml", _CONTAINER_XML)
+        epub_zip.writestr("content.opf", _MINIMAL_OPF)
+        epub_zip.writestr("chapter01.xhtml", _MINIMAL_CHAPTER)
+    return epub_path
@@ -3,10 +3,19 @@ Tests for CFIProcessor class.
 Tests all CFI processing functionality including initialization and text extraction.
 """
 
+import re
+
 import pytest
-from pathlib import Path
+from lxml import etree
+
+from epub_cfi_toolkit import CFIProcessor, EPUBError, CFIError, CFIErrorCode
 
-from epub_cfi_toolkit import CFIProcessor, EPUBError, CFIError
+# Compiled once for the pytest.raises(match=...) assertions below;
+# pytest passes compiled patterns straight to re.search.
+_FILE_NOT_FOUND = re.compile("EPUB file not found")
+_DIFF_DOCS = re.compile("CFI range cannot span different documents")
+_REVERSED = re.compile("End CFI must come after start CFI")
+_ASSERT_MISMATCH = re.compile("assertion mismatch")
 
 
 class TestCFIProcessorInitialization:
@@ -14,119 +23,171 @@ class TestCFIProcessorInitialization:
     
     def test_init_nonexistent_file(self):
         """Test initialization with non-existent EPUB file."""
-        with pytest.raises(EPUBError, match="EPUB file not found"):
+        with pytest.raises(EPUBError, match=_FILE_NOT_FOUND):
             CFIProcessor("nonexistent.epub")
     
-    def test_init_valid_epub(self):
+    def test_init_valid_epub(self, sample_epub_path):
         """Test initialization with valid EPUB file."""
-        epub_path = Path(__file__).parent.parent / "test_data" / "sample.epub"
-        processor = CFIProcessor(str(epub_path))
+        processor = CFIProcessor(str(sample_epub_path))
         
         # Test that the processor was initialized with required components
         assert processor.cfi_parser is not None
         assert processor.epub_parser is not None
 
+    def test_batch_content_read(self, cfi_processor):
+        """Test batched reads match individual reads and share the cache."""
+        epub_parser = cfi_processor.epub_parser
+        spine = epub_parser.spine
+
+        documents = epub_parser.read_content_documents(spine)
+
+        assert len(documents) == len(spine)
+        for spine_item in spine:
+            path = epub_parser.get_content_document_path(spine_item)
+            assert documents[path] == epub_parser.read_content_document(
+                spine_item
+            )
+
+    def test_init_minimal_epub(self, minimal_epub):
+        """Test initialization and parsing against a minimal real EPUB."""
+        with CFIProcessor(str(minimal_epub)) as processor:
+            spine = processor.epub_parser.spine
+            assert len(spine) == 1
+            assert spine[0].id == "chap01ref"
+
+
+# (start CFI, end CFI, expected extraction) cases for the range test
+# below; all resolve into para05/para06 of the sample EPUB's chapter 1.
+_RANGE_CASES = [
+    ("epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/1:0)",
+     "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/1:3)",
+     "xxx"),
+    ("epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/3:9)",
+     "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/3:10)",
+     "9"),
+    ("epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/3:7)",
+     "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/3:10)",
+     "789"),
+    ("epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/1:0)",
+     "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/1:3)",
+     "xxx"),
+    ("epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/2/1:0)",
+     "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/2/1:3)",
+     "yyy"),
+    ("epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/1:1)",
+     "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/2/1:2)",
+     "xxyy"),
+    ("epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/1:0)",
+     "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/3:10)",
+     "xxxyyy0123456789"),
+    ("epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/3:5)",
+     "epubcfi(/6/4[chap01ref]!/4[body01]/12[para06]/1:6)",
+     "56789Sixth "),
+]
+
+_RANGE_CASE_IDS = [
+    "basic",
+    "single_char",
+    "multiple_chars",
+    "text_node_start",
+    "em_element",
+    "across_elements",
+    "full_paragraph",
+    "across_paragraphs",
+]
+
 
 class TestCFIRangeExtraction:
     """Test cases for extracting text from CFI ranges."""
-    
-    @pytest.fixture
-    def sample_epub_path(self):
-        """Return path to sample EPUB file."""
-        return Path(__file__).parent.parent / "test_data" / "sample.epub"
-    
-    @pytest.fixture
-    def cfi_processor(self, sample_epub_path):
-        """Return CFI processor instance."""
-        return CFIProcessor(str(sample_epub_path))
-    
-    def test_basic_functionality(self, cfi_processor):
-        """Test basic CFI range extraction functionality."""
-        # Test basic functionality with a simple CFI range
-        start_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/1:0)"
-        end_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/1:3)"
-        
-        result = cfi_processor.extract_text_from_cfi_range(start_cfi, end_cfi)
-        assert result == "xxx"
-    
-    def test_extract_single_character(self, cfi_processor):
-        """Test extracting a single character using CFI range."""
-        # Extract just the character "9" from "0123456789"
-        start_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/3:9)"
-        end_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/3:10)"
-        
-        result = cfi_processor.extract_text_from_cfi_range(start_cfi, end_cfi)
-        assert result == "9"
-    
-    def test_extract_multiple_characters(self, cfi_processor):
-        """Test extracting multiple characters using CFI range."""
-        # Extract "789" from "0123456789"
-        start_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/3:7)"
-        end_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/3:10)"
-        
-        result = cfi_processor.extract_text_from_cfi_range(start_cfi, end_cfi)
-        assert result == "789"
-    
-    def test_extract_from_text_node_start(self, cfi_processor):
-        """Test extracting from the start of a text node."""
-        # Extract "xxx" from the beginning of para05
-        start_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/1:0)"
-        end_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/1:3)"
-        
-        result = cfi_processor.extract_text_from_cfi_range(start_cfi, end_cfi)
-        assert result == "xxx"
-    
-    def test_extract_from_em_element(self, cfi_processor):
-        """Test extracting text from within an em element."""
-        # Extract "yyy" from the em element
-        start_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/2/1:0)"
-        end_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/2/1:3)"
-        
-        result = cfi_processor.extract_text_from_cfi_range(start_cfi, end_cfi)
-        assert result == "yyy"
-    
-    def test_extract_across_elements(self, cfi_processor):
-        """Test extracting text that spans across elements."""
-        # Extract from "xx" in xxx through "yy" in yyy
-        start_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/1:1)"
-        end_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/2/1:2)"
-        
-        result = cfi_processor.extract_text_from_cfi_range(start_cfi, end_cfi)
-        assert result == "xxyy"
-    
-    def test_extract_full_paragraph_content(self, cfi_processor):
-        """Test extracting the full content of a paragraph."""
-        # Extract entire content of para05: "xxx" + "yyy" + "0123456789"
-        start_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/1:0)"
-        end_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/3:10)"
-        
-        result = cfi_processor.extract_text_from_cfi_range(start_cfi, end_cfi)
-        assert result == "xxxyyy0123456789"
-    
-    def test_extract_across_paragraphs(self, cfi_processor):
-        """Test extracting text across multiple paragraphs."""
-        # Extract from middle of para05 to start of next paragraph
-        start_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/3:5)"
-        end_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/12[para06]/1:6)"
-        
+
+    @pytest.mark.parametrize(
+        "start_cfi,end_cfi,expected", _RANGE_CASES, ids=_RANGE_CASE_IDS
+    )
+    def test_extract_range(self, cfi_processor, start_cfi, end_cfi, expected):
+        """Test CFI range extraction against expected text."""
         result = cfi_processor.extract_text_from_cfi_range(start_cfi, end_cfi)
-        # Should extract "56789" + paragraph break + "Sixth "
-        expected = "56789Sixth "  # Simplified - actual implementation may handle whitespace differently
         assert result == expected
 
+    def test_comment_children_skipped_in_resolution(self, cfi_processor):
+        """Test that element steps ignore comments during extraction."""
+        # Same child counting as the validator: the comment is not an
+        # element child, so /2 must land on the paragraph after it.
+        tree = etree.fromstring(
+            '<body><!-- note --><p id="para01">Hello</p></body>'
+        )
+        parsed = cfi_processor.cfi_parser.parse(
+            "epubcfi(/6/4!/2[para01]/1:0)"
+        )
+        node, offset, seg_type = cfi_processor._resolve_cfi_to_text_position(
+            tree, parsed
+        )
+        assert node.get("id") == "para01"
+        assert (offset, seg_type) == (0, "text")
+
+    def test_inline_whitespace_preserved(self, cfi_processor):
+        """Test that whitespace-only inline segments are kept as content."""
+        # Only indentation between block elements (whitespace spanning a
+        # line break) is formatting; the space inside <b> must survive.
+        tree = etree.fromstring("<p>ab<b> </b>cd</p>")
+        bold = tree[0]
+        result = cfi_processor._extract_text_between_positions(
+            tree, 0, "text", bold, 2, "tail"
+        )
+        assert result == "ab cd"
+
+
+class TestCFIBoundsValidation:
+    """Test whole-EPUB CFI bounds validation."""
+
+    def test_valid_cfi_in_bounds(self, cfi_processor):
+        """Test that a fully resolvable CFI validates."""
+        cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/1:0)"
+        assert cfi_processor.validate_cfi_bounds(cfi)
+
+    def test_element_out_of_bounds(self, cfi_processor):
+        """Test that an element step past the document fails."""
+        cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/50/1:0)"
+        assert not cfi_processor.validate_cfi_bounds(cfi)
+
+    def test_spine_out_of_bounds(self, cfi_processor):
+        """Test that a spine step past the spine fails."""
+        cfi = "epubcfi(/6/40!/4/2/1:0)"
+        assert not cfi_processor.validate_cfi_bounds(cfi)
+
+    def test_malformed_cfi_rejected(self, cfi_processor):
+        """Test that malformed input fails without touching the EPUB."""
+        assert not cfi_processor.validate_cfi_bounds("not a cfi")
+        assert not cfi_processor.validate_cfi_bounds(None)
+
+    def test_batch_validation(self, cfi_processor):
+        """Test concurrent bounds validation of a CFI batch."""
+        results = cfi_processor.validate_cfi_bounds_batch([
+            "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/1:0)",
+            "epubcfi(/6/4[chap01ref]!/4[body01]/50/1:0)",
+            "not a cfi",
+        ])
+        assert results == [True, False, False]
+
+    def test_batch_validation_empty(self, cfi_processor):
+        """Test batch validation of an empty list."""
+        assert cfi_processor.validate_cfi_bounds_batch([]) == []
+
+    def test_strict_raises_element_details(self, cfi_processor):
+        """Test that the strict variant reports the failing element."""
+        cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/50/1:0)"
+        with pytest.raises(CFIError, match="only has"):
+            cfi_processor.validate_cfi_bounds_strict(cfi)
+
+    def test_strict_passes_valid_cfi(self, cfi_processor):
+        """Test that the strict variant accepts a resolvable CFI."""
+        cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/1:0)"
+        # Should not raise
+        cfi_processor.validate_cfi_bounds_strict(cfi)
+
 
 class TestCFIProcessorErrorHandling:
     """Test error handling in CFIProcessor."""
-    
-    @pytest.fixture
-    def sample_epub_path(self):
-        """Return path to sample EPUB file."""
-        return Path(__file__).parent.parent / "test_data" / "sample.epub"
-    
-    @pytest.fixture
-    def cfi_processor(self, sample_epub_path):
-        """Return CFI processor instance."""
-        return CFIProcessor(str(sample_epub_path))
+
     
     def test_invalid_cfi_validation(self, cfi_processor):
         """Test that invalid CFIs raise appropriate errors."""
@@ -149,7 +210,7 @@ class TestCFIProcessorErrorHandling:
         cfi_chap01 = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/1:0)"
         cfi_chap02 = "epubcfi(/6/6[chap02ref]!/4[body02]/2[para01]/1:5)"
         
-        with pytest.raises(CFIError, match="CFI range cannot span different documents"):
+        with pytest.raises(CFIError, match=_DIFF_DOCS):
             cfi_processor.extract_text_from_cfi_range(cfi_chap01, cfi_chap02)
     
     def test_reverse_cfi_range(self, cfi_processor):
@@ -157,29 +218,62 @@ class TestCFIProcessorErrorHandling:
         start_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/3:5)"
         end_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/3:2)"
         
-        with pytest.raises(CFIError, match="End CFI must come after start CFI"):
+        with pytest.raises(CFIError, match=_REVERSED):
             cfi_processor.extract_text_from_cfi_range(start_cfi, end_cfi)
     
+    def test_reversed_range_error_code(self, cfi_processor):
+        """Test that errors expose a machine-readable code and context."""
+        start_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/3:5)"
+        end_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/3:2)"
+
+        with pytest.raises(CFIError) as excinfo:
+            cfi_processor.extract_text_from_cfi_range(start_cfi, end_cfi)
+
+        assert excinfo.value.code == CFIErrorCode.REVERSED_RANGE
+        assert excinfo.value.context["start_cfi"] == start_cfi
+
+    def test_assertion_mismatch_error_code(self, cfi_processor):
+        """Test that assertion failures carry expected/actual context."""
+        start_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[wrongpara]/1:0)"
+        end_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[wrongpara]/1:3)"
+
+        with pytest.raises(CFIError) as excinfo:
+            cfi_processor.extract_text_from_cfi_range(start_cfi, end_cfi)
+
+        assert excinfo.value.code == CFIErrorCode.ASSERTION_MISMATCH
+        assert excinfo.value.context["expected"] == "wrongpara"
+
+    def test_end_cfi_assertion_checked_on_shared_path(self, cfi_processor):
+        """Test that a bad end assertion fails even on a shared index path."""
+        # Both endpoints descend through the same step indices; only the
+        # end CFI carries the wrong assertion, so it must not ride a
+        # cached prefix past its own assertion check.
+        start_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/1:0)"
+        end_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[wrongpara]/3:5)"
+
+        with pytest.raises(CFIError, match=_ASSERT_MISMATCH):
+            cfi_processor.extract_text_from_cfi_range(start_cfi, end_cfi)
+
     def test_same_position_cfi_range(self, cfi_processor):
         """Test CFI range where start and end are the same position."""
         same_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/3:5)"
-        
+
         result = cfi_processor.extract_text_from_cfi_range(same_cfi, same_cfi)
         assert result == ""  # Should return empty string for same position
 
+    def test_same_cfi_missing_itemref_rejected(self, cfi_processor):
+        """Test that an identical but itemref-less CFI pair still raises."""
+        spine_only_cfi = "epubcfi(/6!/4/2/1:0)"
+
+        with pytest.raises(CFIError, match=_DIFF_DOCS):
+            cfi_processor.extract_text_from_cfi_range(
+                spine_only_cfi, spine_only_cfi
+            )
+
 
 class TestCFIProcessorAssertionValidation:
     """Test CFI assertion validation in CFIProcessor."""
-    
-    @pytest.fixture
-    def sample_epub_path(self):
-        """Return path to sample EPUB file."""
-        return Path(__file__).parent.parent / "test_data" / "sample.epub"
-    
-    @pytest.fixture
-    def cfi_processor(self, sample_epub_path):
-        """Return CFI processor instance."""
-        return CFIProcessor(str(sample_epub_path))
+
     
     def test_valid_assertion_match(self, cfi_processor):
         """Test CFI with valid assertion that matches document."""
@@ -196,7 +290,7 @@ class TestCFIProcessorAssertionValidation:
         start_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[wrongpara]/1:0)"
         end_cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[wrongpara]/1:3)"
         
-        with pytest.raises(CFIError, match="assertion mismatch"):
+        with pytest.raises(CFIError, match=_ASSERT_MISMATCH):
             cfi_processor.extract_text_from_cfi_range(start_cfi, end_cfi)
     
     def test_spine_assertion_validation(self, cfi_processor):
@@ -205,22 +299,13 @@ class TestCFIProcessorAssertionValidation:
         start_cfi = "epubcfi(/6/4[wrongchap]!/4[body01]/10[para05]/1:0)"
         end_cfi = "epubcfi(/6/4[wrongchap]!/4[body01]/10[para05]/1:3)"
         
-        with pytest.raises(CFIError, match="assertion mismatch"):
+        with pytest.raises(CFIError, match=_ASSERT_MISMATCH):
             cfi_processor.extract_text_from_cfi_range(start_cfi, end_cfi)
 
 
 class TestCFIProcessorTextNodeHandling:
     """Test text node identification and handling in CFIProcessor."""
-    
-    @pytest.fixture
-    def sample_epub_path(self):
-        """Return path to sample EPUB file."""
-        return Path(__file__).parent.parent / "test_data" / "sample.epub"
-    
-    @pytest.fixture
-    def cfi_processor(self, sample_epub_path):
-        """Return CFI processor instance."""
-        return CFIProcessor(str(sample_epub_path))
+
     
     def test_text_node_identification(self, cfi_processor):
         """Test identification of text nodes in processing."""
@@ -235,21 +320,13 @@ class TestCFIProcessorTextNodeHandling:
 class TestUTF16CharacterOffsets:
     """Test UTF-16 character offset handling with Unicode characters."""
     
-    @pytest.fixture
-    def sample_epub_path(self):
-        """Return path to sample EPUB file.""" 
-        return Path(__file__).parent.parent / "test_data" / "sample.epub"
-    
-    def test_utf16_offset_calculation(self):
+    def test_utf16_offset_calculation(self, cfi_processor):
         """Test that character offsets use UTF-16 code units."""
         # Create test content with Unicode characters
         # This would need a special test EPUB with Unicode content
         # For now, we'll test that offsets work correctly in general
-        epub_path = Path(__file__).parent.parent / "test_data" / "sample.epub"
-        processor = CFIProcessor(str(epub_path))
-        
         cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/1:0)"
-        result = processor.extract_text_from_cfi_range(cfi, "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/1:3)")
+        result = cfi_processor.extract_text_from_cfi_range(cfi, "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/1:3)")
         
         # Should extract 3 characters from offset 0
         assert len(result) == 3
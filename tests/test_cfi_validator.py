@@ -0,0 +1,226 @@
+"""
+Tests for CFIValidator class.
+Tests CFI syntax validation and document reference validation.
+"""
+
+import pytest
+from lxml import etree
+
+from epub_cfi_toolkit import CFIError, CFIValidator
+from epub_cfi_toolkit.epub_parser import EPUBParser
+
+# Tuned parser for the fixture below, mirroring the library's own
+# content-document parser settings.
+_XML_PARSER = etree.XMLParser(
+    resolve_entities=False, huge_tree=False, collect_ids=False
+)
+
+
+@pytest.fixture(scope="module")
+def validator():
+    """Return a CFIValidator shared by every test in this module."""
+    return CFIValidator()
+
+
+@pytest.fixture(scope="module")
+def document_tree(sample_epub_path):
+    """
+    Return the parsed chapter01 document from the sample EPUB.
+
+    Module-scoped: the zip read and XML parse happen once, not once per
+    test, and validation never mutates the tree.
+    """
+    epub_parser = EPUBParser(str(sample_epub_path))
+    spine_item = epub_parser.get_spine_item_by_index(4)
+    content = epub_parser.read_content_document(spine_item)
+    epub_parser.close()
+    return etree.fromstring(content, _XML_PARSER)
+
+
+# CFI literals shared across the document-validation tests. Parsing is
+# memoized library-side, so each literal is parsed once for the module.
+_VALID_CFI = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/1:0)"
+_BAD_ELEMENT_CFI = "epubcfi(/6/4[chap01ref]!/4[body01]/50/1:0)"
+_BAD_ASSERTION_CFI = "epubcfi(/6/4[chap01ref]!/4[body01]/10[wrongpara]/1:0)"
+
+
+def test_cfi_validator_importable():
+    """Test that CFIValidator is the package's single validator export."""
+    import epub_cfi_toolkit
+    from epub_cfi_toolkit import cfi_validator
+
+    assert epub_cfi_toolkit.CFIValidator is cfi_validator.CFIValidator
+    assert cfi_validator.__all__ == ["CFIValidator"]
+
+
+class TestCFISyntaxValidation:
+    """Test syntactic CFI validation."""
+
+    def test_valid_simple_cfi(self, validator):
+        """Test validation of a simple well-formed CFI."""
+        assert validator.validate("/6/4!/4/2/1:0")
+
+    def test_valid_wrapped_cfi(self, validator):
+        """Test validation of a CFI with epubcfi() wrapper."""
+        assert validator.validate("epubcfi(/6/4!/4/2/1:5)")
+
+    def test_valid_cfi_with_assertions(self, validator):
+        """Test validation of a CFI with element assertions."""
+        assert validator.validate(
+            "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/1:0)"
+        )
+
+    def test_valid_cfi_with_range_offset(self, validator):
+        """Test validation of a CFI with :offset~length location."""
+        assert validator.validate("epubcfi(/6/4!/4/2/1:5~10)")
+
+    def test_valid_range_cfi(self, validator):
+        """Test validation of a range CFI with comma syntax."""
+        assert validator.validate("epubcfi(/6/4!, /2/1:0, /2/1:10)")
+
+    def test_valid_cfi_with_escaped_assertion(self, validator):
+        """Test validation of an assertion containing escapes."""
+        assert validator.validate("epubcfi(/6/4!/4/2[id^]test]/1:0)")
+
+    def test_invalid_empty_cfi(self, validator):
+        """Test that empty input is rejected."""
+        assert not validator.validate("")
+
+    def test_invalid_non_string_cfi(self, validator):
+        """Test that non-string input is rejected."""
+        assert not validator.validate(None)
+
+    def test_invalid_missing_leading_slash(self, validator):
+        """Test that a CFI without leading slash is rejected."""
+        assert not validator.validate("6/4!/4/2/1:0")
+
+    def test_invalid_non_numeric_step(self, validator):
+        """Test that a non-numeric step is rejected."""
+        assert not validator.validate("/6/abc!/4/2/1:0")
+
+    def test_invalid_non_numeric_offset(self, validator):
+        """Test that a non-numeric offset is rejected."""
+        assert not validator.validate("/6/4!/4/2/1:abc")
+
+    def test_invalid_trailing_slash(self, validator):
+        """Test that a trailing slash is rejected."""
+        assert not validator.validate("/6/4!/4/2/")
+
+    def test_invalid_unclosed_assertion(self, validator):
+        """Test that an unclosed assertion is rejected."""
+        assert not validator.validate("/6/4[chap!/4/2/1:0")
+
+    def test_validate_many(self, validator):
+        """Test batch syntax validation of multiple CFIs."""
+        results = validator.validate_many(
+            ["/6/4!/4/2/1:0", "not a cfi", "epubcfi(/6/4!/4/2/1:5)"]
+        )
+        assert results == [True, False, True]
+
+    def test_regex_fallback_pathological_input(self, validator, monkeypatch):
+        """Test that the regex fallback rejects hostile input quickly."""
+        from epub_cfi_toolkit import cfi_validator
+
+        monkeypatch.setattr(cfi_validator, "_USE_REGEX_FALLBACK", True)
+        # Long step runs with a trailing mismatch would trigger
+        # catastrophic backtracking in a naively written pattern; this
+        # test hangs rather than fails if that regresses.
+        assert not validator.validate("/1" + "/2" * 1900 + "x")
+        assert not cfi_validator._CFI_PATTERN_BARE.match(
+            "/1" + "/2" * 5000 + "x"
+        )
+
+    def test_regex_fallback_agrees_with_dfa(self, validator, monkeypatch):
+        """Test that the regex reference matches the DFA's verdicts."""
+        from epub_cfi_toolkit import cfi_validator
+
+        cases = [
+            "epubcfi(/6/4!, /2/1:0, /2/1:10)",  # range syntax
+            "epubcfi(/6/4[chap^,01]!, /2/1:0, /2/1:10)",  # escaped comma
+            "epubcfi(/6/4!/4/2[id^]test]/1:0)",  # escaped bracket
+            "/6/4!/4/2/1:5~10",
+            "/6//4",  # empty step
+            "/6!",  # dangling indirection
+            "/6/4!",  # indirection without a target
+            "/6/4!/4/2/1:0,",  # trailing comma
+        ]
+        dfa_verdicts = [validator.validate(cfi) for cfi in cases]
+
+        monkeypatch.setattr(cfi_validator, "_USE_REGEX_FALLBACK", True)
+        regex_verdicts = [validator.validate(cfi) for cfi in cases]
+
+        assert regex_verdicts == dfa_verdicts
+
+
+class TestDocumentValidation:
+    """Test CFI validation against a parsed content document."""
+
+    def test_valid_document_reference(self, validator, document_tree):
+        """Test a CFI whose steps all resolve in the document."""
+        cfi = _VALID_CFI
+        assert validator.validate_against_document(cfi, document_tree)
+
+    def test_invalid_element_reference(self, validator, document_tree):
+        """Test a CFI whose element step exceeds the document."""
+        cfi = _BAD_ELEMENT_CFI
+        assert not validator.validate_against_document(
+            cfi, document_tree
+        )
+
+    def test_invalid_assertion(self, validator, document_tree):
+        """Test a CFI whose assertion does not match the document."""
+        cfi = _BAD_ASSERTION_CFI
+        assert not validator.validate_against_document(
+            cfi, document_tree
+        )
+
+    def test_invalid_syntax_rejected(self, validator, document_tree):
+        """Test that syntactically bad CFIs fail document validation."""
+        assert not validator.validate_against_document(
+            "not a cfi", document_tree
+        )
+
+    def test_strict_validation_passes_valid_cfi(self, validator, document_tree):
+        """Test strict validation of a fully resolvable CFI."""
+        cfi = _VALID_CFI
+        # Should not raise
+        validator.validate_against_document_strict(cfi, document_tree)
+
+    def test_strict_validation_element_error_details(self, validator, document_tree):
+        """Test that strict validation reports unresolvable elements."""
+        cfi = _BAD_ELEMENT_CFI
+        with pytest.raises(CFIError, match="only has"):
+            validator.validate_against_document_strict(
+                cfi, document_tree
+            )
+
+    def test_strict_validation_assertion_mismatch(self, validator, document_tree):
+        """Test that strict validation reports assertion mismatches."""
+        cfi = _BAD_ASSERTION_CFI
+        with pytest.raises(CFIError, match="assertion mismatch"):
+            validator.validate_against_document_strict(
+                cfi, document_tree
+            )
+
+    def test_strict_validation_invalid_syntax(self, validator, document_tree):
+        """Test that strict validation rejects malformed CFIs."""
+        with pytest.raises(CFIError, match="Invalid CFI syntax"):
+            validator.validate_against_document_strict(
+                "not a cfi", document_tree
+            )
+
+    def test_comment_children_not_counted(self, validator):
+        """Test that comments are skipped when resolving element steps."""
+        tree = etree.fromstring(
+            "<html><!-- note --><body id='body01'>"
+            "<p id='para01'>Hi</p></body></html>"
+        )
+        cfi = "epubcfi(/6/4!/2[body01]/2[para01]/1:0)"
+        assert validator.validate_against_document(cfi, tree)
+
+    def test_invalid_text_node_reference(self, validator, document_tree):
+        """Test a CFI referencing a text node that does not exist."""
+        cfi = "epubcfi(/6/4[chap01ref]!/4[body01]/10[para05]/9:0)"
+        assert not validator.validate_against_document(
+            cfi, document_tree
+        )